@@ -1,242 +1,298 @@
-import streamlit as st
-import pandas as pd
-import numpy as np
-from io import BytesIO
-import matplotlib.pyplot as plt
-import matplotlib
-import plotly.express as px
-from datetime import datetime
-
-# 한글 폰트 설정
-matplotlib.rcParams['font.family'] = 'Malgun Gothic'
-matplotlib.rcParams['axes.unicode_minus'] = False
-
-st.set_page_config(page_title="AS 처리율 계산기", layout="wide")
-
-# 제목 및 안내문
-st.markdown(
-    """
-    <h1 style='display: inline;'>📊 AS 처리율 계산기</h1>
-    <p style="color: red; font-size: 30px;">
-    ※ 업로드할 파일은 ERP의 <span style="color: blue;"><u>'AS현황 및 최종확률'</u></span>에서 다운 받은 파일을 업로드하세요!<br>
-    ※ 조회할 기간을 선택하고, <span style="color: blue;"><u>'처리율 분석 실행'</u></span> 버튼을 클릭하세요.
-    </p>
-    """,
-    unsafe_allow_html=True
-)
-
-@st.cache_data(show_spinner=False)
-def classify_product_group(row):
-    if row['AS접수번호'] in ['AS23020137', 'AS22110268', '606746', '606366']:
-        return '설비제어'
-    group1 = row['제품군1']
-    group2 = row['제품군2']
-    if pd.notna(group1):
-        if group1 in ['설비제어', '중단사업', '가스솔루션']:
-            return '설비제어'
-        elif group1 == '배전반':
-            return '배전반'
-        elif group1 in ['평형수처리', '연구개발']:
-            return 'BWMS'
-    if pd.notna(group2):
-        if group2 in ['ICMS', 'MAPS', 'IAS', '제어기타', '항해제어', 'FGSS', 'OFFSHORE', '발전기모터', 'A/S']:
-            return '설비제어'
-        elif group2 in ['고압', '저압']:
-            return '배전반'
-        elif group2 == 'BWMS':
-            return 'BWMS'
-    return '기타'
-
-@st.cache_data(show_spinner=False)
-def classify_as구분(as구분):
-    if as구분 in ['위탁AS', '무상']:
-        return '무상'
-    elif as구분 in ['유상', '단품판매']:
-        return '유상'
-    return '기타'
-
-@st.cache_data(show_spinner=False)
-def classify_진행상태(상태):
-    if 상태 in ['접수', '조치중']:
-        return '조치중'
-    elif 상태 in ['기술적종료', '공사완료', '최종완료']:
-        return '조치완료'
-    return '기타'
-
-def process_data(df, start_ym, end_ym):
-    df = df.copy()
-    df['AS접수일자'] = pd.to_datetime(df['AS접수일자'], format='%Y/%m/%d', errors='coerce')
-    df['접수년월_dt'] = df['AS접수일자'].dt.to_period('M').dt.to_timestamp()
-    df['접수년월'] = df['접수년월_dt'].dt.strftime('%m-%Y')
-
-    df = df[
-        (df['전자결재번호상태'] == '종결') &
-        (df['AS진행상태'] != '접수취소') &
-        (df['AS접수번호'] != 'AS21120297')
-    ]
-    df = df[(df['접수년월_dt'] >= start_ym) & (df['접수년월_dt'] <= end_ym)]
-
-    df['제품군'] = df.apply(classify_product_group, axis=1)
-    df['AS구분'] = df['AS구분'].apply(classify_as구분)
-    df['진행상태분류'] = df['AS진행상태'].apply(classify_진행상태)
-
-    df['AS접수건수'] = 1
-    df['조치완료건수'] = df['진행상태분류'].apply(lambda x: 1 if x == '조치완료' else 0)
-
-    result = df.groupby(['AS구분', '제품군', '접수년월', '접수년월_dt']).agg({
-        'AS접수건수': 'sum',
-        '조치완료건수': 'sum'
-    }).reset_index()
-
-    result['AS처리율'] = (result['조치완료건수'] / result['AS접수건수'] * 100).round(2)
-    result = result.sort_values(['AS구분', '제품군', '접수년월_dt'])
-
-    def make_summary_row(구분):
-        temp = result[result['AS구분'] == 구분]
-        접수합 = temp['AS접수건수'].sum()
-        완료합 = temp['조치완료건수'].sum()
-        return pd.DataFrame([{
-            'AS구분': f'{구분} 합계',
-            '제품군': '',
-            '접수년월': '',
-            '접수년월_dt': pd.NaT,
-            'AS접수건수': 접수합,
-            '조치완료건수': 완료합,
-            'AS처리율': round(완료합 / 접수합 * 100, 2) if 접수합 > 0 else 0
-        }])
-
-    합계1 = make_summary_row('무상')
-    합계2 = make_summary_row('유상')
-    total접수 = result['AS접수건수'].sum()
-    total완료 = result['조치완료건수'].sum()
-    전체합계 = pd.DataFrame([{
-        'AS구분': '전체 합계',
-        '제품군': '',
-        '접수년월': '',
-        '접수년월_dt': pd.NaT,
-        'AS접수건수': total접수,
-        '조치완료건수': total완료,
-        'AS처리율': round(total완료 / total접수 * 100, 2) if total접수 > 0 else 0
-    }])
-
-    result = pd.concat([result, 합계1, 합계2, 전체합계], ignore_index=True)
-
-    graph_df = df.groupby(['제품군', '접수년월', '접수년월_dt']).agg(
-        {'AS접수건수': 'sum', '조치완료건수': 'sum'}
-    ).reset_index()
-    graph_df['AS처리율'] = (graph_df['조치완료건수'] / graph_df['AS접수건수'] * 100).round(2)
-    graph_df = graph_df.sort_values('접수년월_dt')
-
-    return result, df, graph_df
-
-def plot_interactive_chart(df):
-    fig = px.bar(
-        df, x='접수년월', y='AS처리율', color='제품군',
-        barmode='group', text='AS처리율',
-        title='월별 AS 처리율 (제품군별 합산 기준)'
-    )
-    fig.update_traces(texttemplate='%{text}%', textposition='outside')
-    fig.update_layout(uniformtext_minsize=8, uniformtext_mode='hide')
-    fig.update_yaxes(range=[0, 100])
-    st.plotly_chart(fig, use_container_width=True)
-    return fig
-
-def save_chart_to_image(df):
-    fig, ax = plt.subplots(figsize=(16, 8))
-    제품군_목록 = df['제품군'].unique()
-    x_labels = sorted(df['접수년월'].unique(), key=lambda x: pd.to_datetime('01-' + x, format='%d-%m-%Y'))
-    width = 0.8 / len(제품군_목록)
-
-    for i, 제품군 in enumerate(제품군_목록):
-        sub_df = df[df['제품군'] == 제품군]
-        grouped = sub_df.groupby('접수년월')['AS처리율'].mean().reindex(x_labels).fillna(0)
-        x_pos = np.arange(len(x_labels)) + (i - len(제품군_목록)/2)*width + width/2
-        bars = ax.bar(x_pos, grouped.values, width=width, label=제품군)
-        for bar, height in zip(bars, grouped.values):
-            if height > 0:
-                ax.text(bar.get_x() + bar.get_width()/2, height + 1, f'{height:.1f}%',
-                        ha='center', va='bottom', fontsize=9)
-
-    ax.set_ylabel('AS 처리율 (%)')
-    ax.set_xlabel('접수년월')
-    ax.set_title('월별 AS 처리율 (엑셀용 이미지)')
-    ax.set_xticks(np.arange(len(x_labels)))
-    ax.set_xticklabels(x_labels, rotation=45, ha='right')
-    ax.set_ylim(0, 110)
-    ax.legend()
-    plt.tight_layout()
-    img_data = BytesIO()
-    fig.savefig(img_data, format='png')
-    img_data.seek(0)
-    return img_data
-
-def to_excel(result_df, original_df, image_data):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        result_df.drop(columns='접수년월_dt').to_excel(writer, index=False, sheet_name='AS처리율')
-        original_df.to_excel(writer, index=False, sheet_name='원본데이터')
-        worksheet = writer.sheets['AS처리율']
-        worksheet.insert_image('K2', 'chart.png', {'image_data': image_data})
-    output.seek(0)
-    return output
-
-uploaded_file = st.file_uploader("📎 AS 데이터 엑셀 파일을 업로드하세요", type=["xlsx"])
-
-if uploaded_file:
-    try:
-        df = pd.read_excel(uploaded_file, skiprows=1)  # Skip header row from ERP file
-        df['AS접수일자'] = pd.to_datetime(df['AS접수일자'], format='%Y/%m/%d', errors='coerce')
-    except Exception as e:
-        st.error(
-            f"""
-            ❌ 엑셀 파일을 열 수 없습니다.  
-            🔒 DRM(디지털 권한 관리)으로 보호된 파일일 수 있습니다.  
-            👉 오류 내용: {e}
-            """
-        )
-        st.stop()
-
-    if 'AS접수일자' in df.columns:
-        year_options = sorted(df['AS접수일자'].dt.year.dropna().astype(int).unique())
-        month_options = list(range(1, 13))
-
-        col1, col2 = st.columns(2)
-        with col1:
-            start_year = st.selectbox("시작 년도", year_options)
-            start_month = st.selectbox("시작 월", month_options)
-        with col2:
-            end_year = st.selectbox("종료 년도", year_options, index=len(year_options)-1)
-            end_month = st.selectbox("종료 월", month_options, index=11)
-
-        if 'result_df' not in st.session_state:
-            st.session_state.result_df = None
-            st.session_state.filtered_df = None
-            st.session_state.graph_df = None
-
-        if st.button("📊 처리율 분석 실행"):
-            try:
-                start_ym = datetime(start_year, start_month, 1)
-                end_ym = datetime(end_year, end_month, 28)
-                result_df, filtered_df, graph_df = process_data(df, start_ym, end_ym)
-
-                st.session_state.result_df = result_df
-                st.session_state.filtered_df = filtered_df
-                st.session_state.graph_df = graph_df
-
-                st.success("✅ 처리 완료!")
-            except Exception as e:
-                st.error(f"❌ 오류 발생: {e}")
-
-        if st.session_state.result_df is not None:
-            st.dataframe(st.session_state.result_df.drop(columns='접수년월_dt'))
-            if st.session_state.graph_df is not None:
-                fig = plot_interactive_chart(st.session_state.graph_df)
-                image_data = save_chart_to_image(st.session_state.graph_df)
-                st.download_button(
-                    label="📥 결과 엑셀 다운로드 (그래프 포함)",
-                    data=to_excel(st.session_state.result_df, st.session_state.filtered_df, image_data),
-                    file_name=f"AS처리율_{start_year}{start_month:02d}_{end_year}{end_month:02d}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-    else:
-        st.error("❗ 'AS접수일자' 컬럼이 파일에 존재하지 않습니다.")
\ No newline at end of file
+import streamlit as st
+import pandas as pd
+import numpy as np
+from io import BytesIO
+import matplotlib.pyplot as plt
+import matplotlib
+import plotly.express as px
+from datetime import datetime
+
+import budget
+import datasets
+import downloads
+import history
+import widgets
+
+INPUTS = ["AS현황"]
+
+# 한글 폰트 설정
+matplotlib.rcParams['font.family'] = 'Malgun Gothic'
+matplotlib.rcParams['axes.unicode_minus'] = False
+
+# ✅ 분류 기준 (AS접수번호 예외 → 제품군1 → 제품군2 순서로 판단)
+설비제어_예외 = ['AS23020137', 'AS22110268', '606746', '606366']
+제품군1_분류 = [
+    (['설비제어', '중단사업', '가스솔루션'], '설비제어'),
+    (['배전반'], '배전반'),
+    (['평형수처리', '연구개발'], 'BWMS'),
+]
+제품군2_분류 = [
+    (['ICMS', 'MAPS', 'IAS', '제어기타', '항해제어', 'FGSS', 'OFFSHORE', '발전기모터', 'A/S'], '설비제어'),
+    (['고압', '저압'], '배전반'),
+    (['BWMS'], 'BWMS'),
+]
+AS구분_분류 = [(['위탁AS', '무상'], '무상'), (['유상', '단품판매'], '유상')]
+진행상태_분류 = [(['접수', '조치중'], '조치중'), (['기술적종료', '공사완료', '최종완료'], '조치완료')]
+
+
+def _select(series, rules, default='기타'):
+    return np.select([series.isin(values) for values, _ in rules], [label for _, label in rules], default)
+
+
+def classify_product_group(df):
+    # 행마다 apply 하지 않고 컬럼 단위로 판정한다
+    rules = [(df['AS접수번호'].isin(설비제어_예외), '설비제어')]
+    rules += [(df['제품군1'].isin(values), label) for values, label in 제품군1_분류]
+    rules += [(df['제품군2'].isin(values), label) for values, label in 제품군2_분류]
+    return np.select([mask for mask, _ in rules], [label for _, label in rules], '기타')
+
+
+def prepare(df):
+    # 처리율 계산 대상(종결, 접수취소 제외)만 남기고 접수년월과 분류 컬럼을 붙인다
+    # 얕은 복사: 컬럼 데이터는 넘겨받은 표와 공유하고, 바꾸거나 붙이는 컬럼만 새로 만든다 (copy-on-write)
+    df = df.copy(deep=False)
+    df['AS접수일자'] = pd.to_datetime(df['AS접수일자'], format='%Y/%m/%d', errors='coerce')
+    df['접수년월_dt'] = df['AS접수일자'].dt.to_period('M').dt.to_timestamp()
+    df['접수년월'] = df['접수년월_dt'].dt.strftime('%m-%Y')
+
+    df = df[
+        (df['전자결재번호상태'] == '종결') &
+        (df['AS진행상태'] != '접수취소') &
+        (df['AS접수번호'] != 'AS21120297')
+    ]
+
+    df['제품군'] = classify_product_group(df)
+    df['AS구분'] = _select(df['AS구분'], AS구분_분류)
+    df['진행상태분류'] = _select(df['AS진행상태'], 진행상태_분류)
+
+    df['AS접수건수'] = 1
+    df['조치완료건수'] = (df['진행상태분류'] == '조치완료').astype(int)
+    return df
+
+
+def record_history(df, sha):
+    # 전체 파일 기준 월별 접수/조치완료 건수를 처리율 이력에 반영한다 (같은 파일은 한 번만)
+    # 파일 기준일은 접수일자/기술적종료일자 중 가장 늦은 날 (예전 파일이 최신 이력을 덮어쓰지 않게)
+    if history.has(sha):
+        return
+    df = prepare(df)
+    counts = df.groupby(['접수년월_dt'] + history.KEYS)[history.COUNTS].sum().reset_index()
+    dates = [df['AS접수일자']]
+    if '기술적종료일자' in df.columns:
+        dates.append(pd.to_datetime(df['기술적종료일자'], errors='coerce'))
+    as_of = pd.concat(dates).max()
+    history.update(sha, counts, as_of if pd.notna(as_of) else datetime.today())
+
+
+def process_data(df, start_ym, end_ym):
+    df = prepare(df)
+    df = df[(df['접수년월_dt'] >= start_ym) & (df['접수년월_dt'] <= end_ym)]
+
+    result = df.groupby(['AS구분', '제품군', '접수년월', '접수년월_dt']).agg({
+        'AS접수건수': 'sum',
+        '조치완료건수': 'sum'
+    }).reset_index()
+
+    result['AS처리율'] = (result['조치완료건수'] / result['AS접수건수'] * 100).round(2)
+    result = result.sort_values(['AS구분', '제품군', '접수년월_dt'])
+
+    def make_summary_row(구분):
+        temp = result[result['AS구분'] == 구분]
+        접수합 = temp['AS접수건수'].sum()
+        완료합 = temp['조치완료건수'].sum()
+        return pd.DataFrame([{
+            'AS구분': f'{구분} 합계',
+            '제품군': '',
+            '접수년월': '',
+            '접수년월_dt': pd.NaT,
+            'AS접수건수': 접수합,
+            '조치완료건수': 완료합,
+            'AS처리율': round(완료합 / 접수합 * 100, 2) if 접수합 > 0 else 0
+        }])
+
+    합계1 = make_summary_row('무상')
+    합계2 = make_summary_row('유상')
+    total접수 = result['AS접수건수'].sum()
+    total완료 = result['조치완료건수'].sum()
+    전체합계 = pd.DataFrame([{
+        'AS구분': '전체 합계',
+        '제품군': '',
+        '접수년월': '',
+        '접수년월_dt': pd.NaT,
+        'AS접수건수': total접수,
+        '조치완료건수': total완료,
+        'AS처리율': round(total완료 / total접수 * 100, 2) if total접수 > 0 else 0
+    }])
+
+    result = pd.concat([result, 합계1, 합계2, 전체합계], ignore_index=True)
+
+    graph_df = df.groupby(['제품군', '접수년월', '접수년월_dt']).agg(
+        {'AS접수건수': 'sum', '조치완료건수': 'sum'}
+    ).reset_index()
+    graph_df['AS처리율'] = (graph_df['조치완료건수'] / graph_df['AS접수건수'] * 100).round(2)
+    graph_df = graph_df.sort_values('접수년월_dt')
+
+    return result, df, graph_df
+
+def plot_interactive_chart(df):
+    fig = px.bar(
+        df, x='접수년월', y='AS처리율', color='제품군',
+        barmode='group', text='AS처리율',
+        title='월별 AS 처리율 (제품군별 합산 기준)'
+    )
+    fig.update_traces(texttemplate='%{text}%', textposition='outside')
+    fig.update_layout(uniformtext_minsize=8, uniformtext_mode='hide')
+    fig.update_yaxes(range=[0, 100])
+    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+def save_chart_to_image(df):
+    fig, ax = plt.subplots(figsize=(16, 8))
+    제품군_목록 = df['제품군'].unique()
+    x_labels = sorted(df['접수년월'].unique(), key=lambda x: pd.to_datetime('01-' + x, format='%d-%m-%Y'))
+    width = 0.8 / len(제품군_목록)
+
+    for i, 제품군 in enumerate(제품군_목록):
+        sub_df = df[df['제품군'] == 제품군]
+        grouped = sub_df.groupby('접수년월')['AS처리율'].mean().reindex(x_labels).fillna(0)
+        x_pos = np.arange(len(x_labels)) + (i - len(제품군_목록)/2)*width + width/2
+        bars = ax.bar(x_pos, grouped.values, width=width, label=제품군)
+        for bar, height in zip(bars, grouped.values):
+            if height > 0:
+                ax.text(bar.get_x() + bar.get_width()/2, height + 1, f'{height:.1f}%',
+                        ha='center', va='bottom', fontsize=9)
+
+    ax.set_ylabel('AS 처리율 (%)')
+    ax.set_xlabel('접수년월')
+    ax.set_title('월별 AS 처리율 (엑셀용 이미지)')
+    ax.set_xticks(np.arange(len(x_labels)))
+    ax.set_xticklabels(x_labels, rotation=45, ha='right')
+    ax.set_ylim(0, 110)
+    ax.legend()
+    plt.tight_layout()
+    img_data = BytesIO()
+    fig.savefig(img_data, format='png')
+    img_data.seek(0)
+    return img_data
+
+def to_excel(result_df, original_df, image_data):
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        result_df.drop(columns='접수년월_dt').to_excel(writer, index=False, sheet_name='AS처리율')
+        original_df.to_excel(writer, index=False, sheet_name='원본데이터')
+        worksheet = writer.sheets['AS처리율']
+        worksheet.insert_image('K2', 'chart.png', {'image_data': image_data})
+    output.seek(0)
+    return output
+
+def show_trend():
+    # ✅ 지금까지 올린 파일로 쌓은 월별 이력에서 12개월 이동 처리율과 전년 동월 대비를 보여준다
+    data = history.load()
+    if data.empty:
+        return
+    st.markdown("### 📈 12개월 이동 AS 처리율 추이 (누적 이력)")
+    col1, col2 = st.columns(2)
+    with col1:
+        구분 = st.selectbox("AS구분", ["전체"] + sorted(data['AS구분'].unique()), key="trend_as구분")
+    with col2:
+        제품군 = st.selectbox("제품군", ["전체"] + sorted(data['제품군'].unique()), key="trend_제품군")
+    if 구분 != "전체":
+        data = data[data['AS구분'] == 구분]
+    if 제품군 != "전체":
+        data = data[data['제품군'] == 제품군]
+
+    trend = history.rolling(data)
+    if trend.empty:
+        st.info("선택한 조건의 이력이 없습니다.")
+        return
+    fig = px.line(
+        trend.reset_index(), x='접수년월', y=['AS처리율', '12개월 이동 처리율', '전년 동월 처리율'],
+        markers=True, title='월별 / 12개월 이동 / 전년 동월 AS 처리율'
+    )
+    fig.update_yaxes(range=[0, 100])
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(trend.sort_index(ascending=False).head(24), use_container_width=True)
+    st.caption(f"이력 기간 {trend.index.min():%Y-%m} ~ {trend.index.max():%Y-%m} · 반영된 파일 {len(history.sources())}개")
+
+
+def app():
+    st.set_page_config(page_title="AS 처리율 계산기", layout="wide")
+
+    # 제목 및 안내문
+    st.markdown(
+        """
+        <h1 style='display: inline;'>📊 AS 처리율 계산기</h1>
+        <p style="color: red; font-size: 30px;">
+        ※ 업로드할 파일은 ERP의 <span style="color: blue;"><u>'AS현황 및 최종확률'</u></span>에서 다운 받은 파일을 업로드하세요!<br>
+        ※ 조회할 기간을 선택하고, <span style="color: blue;"><u>'처리율 분석 실행'</u></span> 버튼을 클릭하세요.
+        </p>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # 전체 파일을 읽는 동안에도 미리보기 데이터로 기간을 먼저 고를 수 있다
+    df = datasets.load("AS현황", "📎 AS 데이터 엑셀 파일을 업로드하세요", header=1, preview=True)  # Skip header row from ERP file
+    if df is None:
+        show_trend()
+        return
+    ready = datasets.is_ready("AS현황")
+    if ready:
+        record_history(df, datasets.fingerprint("AS현황"))
+
+    if 'AS접수일자' in df.columns:
+        df['AS접수일자'] = pd.to_datetime(df['AS접수일자'], format='%Y/%m/%d', errors='coerce')
+        year_options = sorted(df['AS접수일자'].dt.year.dropna().astype(int).unique())
+        month_options = list(range(1, 13))
+
+        col1, col2 = st.columns(2)
+        with col1:
+            start_year = st.selectbox("시작 년도", year_options)
+            start_month = st.selectbox("시작 월", month_options)
+        with col2:
+            end_year = st.selectbox("종료 년도", year_options, index=len(year_options)-1)
+            end_month = st.selectbox("종료 월", month_options, index=11)
+
+        if st.button("📊 처리율 분석 실행", disabled=not ready):
+            try:
+                start_ym = datetime(start_year, start_month, 1)
+                end_ym = datetime(end_year, end_month, 28)
+                result_df, filtered_df, graph_df = process_data(df, start_ym, end_ym)
+
+                # 세션 메모리 예산/보관 한도를 넘거나 오래 안 보면 범주형으로 줄이거나 디스크로 내려 보관하고,
+                # 비워진 뒤 다시 보면 같은 파일·기간으로 다시 계산한다
+                def recompute(df=df, start_ym=start_ym, end_ym=end_ym):
+                    return dict(zip(["result_df", "filtered_df", "graph_df"], process_data(df, start_ym, end_ym)))
+
+                budget.keep("처리율 분석", recompute, result_df=result_df, filtered_df=filtered_df, graph_df=graph_df)
+
+                st.success("✅ 처리 완료!")
+            except Exception as e:
+                st.error(f"❌ 오류 발생: {e}")
+
+        result_df = budget.get("result_df")
+        graph_df = budget.get("graph_df")
+        if result_df is not None:
+            widgets.paged_dataframe(result_df.drop(columns='접수년월_dt'), key="as_process_result")
+            if graph_df is not None:
+                filtered_df = budget.get("filtered_df")
+                fig = plot_interactive_chart(graph_df)
+                image_data = save_chart_to_image(graph_df)
+                st.download_button(
+                    label="📥 결과 엑셀 다운로드 (그래프 포함)",
+                    data=to_excel(result_df, filtered_df, image_data),
+                    file_name=f"AS처리율_{start_year}{start_month:02d}_{end_year}{end_month:02d}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+                downloads.stream_buttons(
+                    {'AS처리율': result_df.drop(columns='접수년월_dt'), '원본데이터': filtered_df},
+                    f"AS처리율_{start_year}{start_month:02d}_{end_year}{end_month:02d}",
+                    key="as_process",
+                )
+    else:
+        st.error("❗ 'AS접수일자' 컬럼이 파일에 존재하지 않습니다.")
+
+    show_trend()
+
+
+if __name__ == "__main__":
+    app()
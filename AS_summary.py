@@ -1,189 +1,394 @@
-import streamlit as st
-import pandas as pd
-import numpy as np
-from datetime import datetime
-import io
-import plotly.express as px
-
-st.set_page_config(layout="wide")
-st.title("📊 AS 접수/조치/조치일 집계 시스템")
-
-# 안내 문구 (uc81c목 바로 아래)
-st.markdown("""
-<p style='font-size:24px; color:red;'>
-※ 업로드할 파일은 ERP의 
-<span style='color:blue; font-weight:bold;'>"AS현황 및 최종완료"</span>
-에서 다운 받은 파일을 업로드하세요!
-</p>
-""", unsafe_allow_html=True)
-
-uploaded_file = st.file_uploader("엑셀 파일을 업로드하세요.", type=["xlsx"])
-
-if uploaded_file:
-    df = pd.read_excel(uploaded_file)
-
-    df = df[df['전자결재번호상태'] == '종결'].copy()
-    df['AS접수일자'] = pd.to_datetime(df['AS접수일자'], errors='coerce')
-    df['기술적종료일자'] = pd.to_datetime(df['기술적종료일자'], errors='coerce')
-    today = pd.to_datetime(datetime.today().date())
-
-    df['AS접수년월'] = df['AS접수일자'].dt.strftime('%Y%m')
-    df['기술적종료년월'] = df['기술적종료일자'].dt.strftime('%Y%m')
-
-    def classify_status(s):
-        if s in ['접수', '조치중']:
-            return '조치중'
-        elif s in ['기술적종료', '공사완료', '최종완료']:
-            return '조치완료'
-        return '기타'
-
-    df['진행상태'] = df['AS진행상태'].apply(classify_status)
-    df['당월조치대상'] = np.where(df['AS접수년월'] == df['기술적종료년월'], 'O', 'X')
-    df['조치일'] = (df['기술적종료일자'] - df['AS접수일자']).dt.days
-    df['미조치일'] = np.where(df['기술적종료일자'].isna(), (today - df['AS접수일자']).dt.days, np.nan)
-
-    reports = {'필터링_원본결과': df.copy()}
-
-    def generate_report(title, sheet_name, filter_df, values, aggfuncs, suffix_cols=None, y_label="건수", rename_map=None, chart_use_avg_col=None):
-        st.markdown(f"## {title}")
-        pivot = pd.pivot_table(
-            filter_df,
-            index=['접수담당자', 'AS접수년월'],
-            values=values,
-            aggfunc=aggfuncs,
-            fill_value=0
-        ).reset_index()
-
-        if suffix_cols:
-            for new_col, numerator, denominator in suffix_cols:
-                pivot[new_col] = pivot[numerator] / pivot[denominator]
-                pivot[new_col] = pivot[new_col].round(1)
-
-        pivot['담당자_년월'] = pivot['접수담당자'] + "_" + pivot['AS접수년월']
-
-        if rename_map:
-            pivot = pivot.rename(columns=rename_map)
-            values = [rename_map.get(v, v) for v in values]
-            if suffix_cols:
-                for col_tuple in suffix_cols:
-                    values.append(col_tuple[0])
-
-        reports[sheet_name] = pivot.copy()
-        st.dataframe(pivot)
-
-        chart_cols = values.copy()
-        if chart_use_avg_col:
-            chart_cols = [v if v != chart_use_avg_col[0] else chart_use_avg_col[1] for v in values]
-
-        if len(chart_cols) == 1:
-            fig = px.bar(
-                pivot,
-                x='담당자_년월',
-                y=chart_cols[0],
-                labels={'담당자_년월': '담당자 및 년월', chart_cols[0]: y_label},
-                title=title,
-                text=chart_cols[0]
-            )
-        else:
-            melted = pivot.melt(id_vars='담당자_년월', value_vars=chart_cols, var_name='항목', value_name='값')
-            fig = px.bar(
-                melted,
-                x='담당자_년월',
-                y='값',
-                color='항목',
-                barmode='group',
-                labels={'담당자_년월': '담당자 및 년월', '값': y_label},
-                title=title,
-                text='값'
-            )
-
-        fig.update_traces(textposition='outside', textfont_size=12)
-        fig.update_layout(uniformtext_minsize=10, uniformtext_mode='hide')
-        st.plotly_chart(fig, use_container_width=True)
-
-    # 보고서 1
-    generate_report(
-        "담당자 및 월별 접수 건수",
-        "접수건수",
-        df,
-        values=['AS접수번호'],
-        aggfuncs={'AS접수번호': 'count'},
-        y_label="접수 건수"
-    )
-
-    # 보고서 2
-    df2 = df.copy()
-    df2['조치완료건수'] = np.where(df2['진행상태'] == '조치완료', 1, 0)
-    df2['조치중건수'] = np.where(df2['진행상태'] == '조치중', 1, 0)
-
-    generate_report(
-        "담당자 및 월별 접수 및 조치완료 건수",
-        "접수및조치건수",
-        df2,
-        values=['AS접수번호', '조치완료건수', '조치중건수'],
-        aggfuncs={
-            'AS접수번호': 'count',
-            '조치완료건수': 'sum',
-            '조치중건수': 'sum'
-        },
-        rename_map={'AS접수번호': 'AS접수건수'},
-        y_label="건수"
-    )
-
-    # 보고서 3
-    generate_report(
-        "담당자 및 월별 조치기간",
-        "조치기간",
-        df[df['진행상태'] == '조치완료'],
-        values=['AS접수번호', '조치일'],
-        aggfuncs={
-            'AS접수번호': 'count',
-            '조치일': 'sum'
-        },
-        suffix_cols=[('평균 조치일', '조치일', 'AS접수번호')],
-        rename_map={'AS접수번호': 'AS접수건수'},
-        y_label="조치일 수",
-        chart_use_avg_col=('조치일', '평균 조치일')
-    )
-
-    # 보고서 4
-    generate_report(
-        "담당자 및 월별 미조치기간",
-        "미조치기간",
-        df[df['진행상태'] == '조치중'],
-        values=['AS접수번호', '미조치일'],
-        aggfuncs={
-            'AS접수번호': 'count',
-            '미조치일': 'sum'
-        },
-        suffix_cols=[('평균 미조치일', '미조치일', 'AS접수번호')],
-        rename_map={'AS접수번호': 'AS접수건수'},
-        y_label="미조치일 수",
-        chart_use_avg_col=('미조치일', '평균 미조치일')
-    )
-
-    # 보고서 5
-    generate_report(
-        "담당자 및 월별 당월조치대상",
-        "당월조치대상",
-        df[df['당월조치대상'] == 'O'],
-        values=['AS접수번호', '조치일'],
-        aggfuncs={
-            'AS접수번호': 'count',
-            '조치일': 'sum'
-        },
-        suffix_cols=[('평균 조치일', '조치일', 'AS접수번호')],
-        rename_map={'AS접수번호': 'AS접수건수'},
-        y_label="조치일 수",
-        chart_use_avg_col=('조치일', '평균 조치일')
-    )
-
-    # 전체 엘셀 다운로드
-    if reports:
-        st.markdown("### 📦 전체 보고서 통합 다운로드")
-        output_all = io.BytesIO()
-        with pd.ExcelWriter(output_all, engine='xlsxwriter') as writer:
-            for sheet, data in reports.items():
-                sheet_name = sheet[:31]
-                data.to_excel(writer, index=False, sheet_name=sheet_name)
-        st.download_button("📅 전체 집계 결과 엘셀 다운로드", output_all.getvalue(), file_name="AS_분석_보고서.xlsx")
+import streamlit as st
+import pandas as pd
+import numpy as np
+from datetime import datetime
+import io
+from collections.abc import Mapping
+import plotly.express as px
+
+import AS_PROCESS
+import budget
+import datasets
+import downloads
+import drilldown
+import jobs
+import percentiles
+import queries
+import reports
+import survival
+
+INPUTS = ["AS현황"]
+
+
+# ✅ 보고서별 집계 설정 (rows: build 에서 만드는 대상 행 묶음 이름)
+REPORTS = [
+    # 보고서 1
+    dict(
+        title="담당자 및 월별 접수 건수",
+        sheet_name="접수건수",
+        rows="전체",
+        values=['AS접수번호'],
+        aggfuncs={'AS접수번호': 'count'},
+        y_label="접수 건수"
+    ),
+    # 보고서 2
+    dict(
+        title="담당자 및 월별 접수 및 조치완료 건수",
+        sheet_name="접수및조치건수",
+        rows="건수",
+        values=['AS접수번호', '조치완료건수', '조치중건수'],
+        aggfuncs={
+            'AS접수번호': 'count',
+            '조치완료건수': 'sum',
+            '조치중건수': 'sum'
+        },
+        rename_map={'AS접수번호': 'AS접수건수'},
+        y_label="건수"
+    ),
+    # 보고서 3
+    dict(
+        title="담당자 및 월별 조치기간",
+        sheet_name="조치기간",
+        rows="조치완료",
+        values=['AS접수번호', '조치일'],
+        aggfuncs={
+            'AS접수번호': 'count',
+            '조치일': 'sum'
+        },
+        suffix_cols=[('평균 조치일', '조치일', 'AS접수번호')],
+        rename_map={'AS접수번호': 'AS접수건수'},
+        y_label="조치일 수",
+        chart_use_avg_col=('조치일', '평균 조치일')
+    ),
+    # 보고서 4
+    dict(
+        title="담당자 및 월별 미조치기간",
+        sheet_name="미조치기간",
+        rows="조치중",
+        values=['AS접수번호', '미조치일'],
+        aggfuncs={
+            'AS접수번호': 'count',
+            '미조치일': 'sum'
+        },
+        suffix_cols=[('평균 미조치일', '미조치일', 'AS접수번호')],
+        rename_map={'AS접수번호': 'AS접수건수'},
+        y_label="미조치일 수",
+        chart_use_avg_col=('미조치일', '평균 미조치일')
+    ),
+    # 보고서 5
+    dict(
+        title="담당자 및 월별 당월조치대상",
+        sheet_name="당월조치대상",
+        rows="당월조치대상",
+        values=['AS접수번호', '조치일'],
+        aggfuncs={
+            'AS접수번호': 'count',
+            '조치일': 'sum'
+        },
+        suffix_cols=[('평균 조치일', '조치일', 'AS접수번호')],
+        rename_map={'AS접수번호': 'AS접수건수'},
+        y_label="조치일 수",
+        chart_use_avg_col=('조치일', '평균 조치일')
+    ),
+]
+
+
+def generate_report(filter_df, aggfuncs, suffix_cols=None, rename_map=None, **chart):
+    pivot = queries.aggregate(filter_df, ['접수담당자', 'AS접수년월'], aggfuncs)
+
+    if suffix_cols:
+        for new_col, numerator, denominator in suffix_cols:
+            pivot[new_col] = pivot[numerator] / pivot[denominator]
+            pivot[new_col] = pivot[new_col].round(1)
+
+    # 담당자_년월은 행마다 문자열을 이어 붙이지 않고, 고유 (담당자, 년월) 조합의 이름만 만들어 범주형으로 둔다
+    codes, pairs = pd.MultiIndex.from_frame(pivot[['접수담당자', 'AS접수년월']]).factorize()
+    pivot['담당자_년월'] = pd.Categorical.from_codes(codes, categories=[f"{담당자}_{년월}" for 담당자, 년월 in pairs])
+
+    if rename_map:
+        pivot = pivot.rename(columns=rename_map)
+    return pivot
+
+
+def draw_report(pivot, title, values, suffix_cols=None, y_label="건수", rename_map=None, chart_use_avg_col=None, **report):
+    st.markdown(f"## {title}")
+    if rename_map:
+        values = [rename_map.get(v, v) for v in values]
+        if suffix_cols:
+            for col_tuple in suffix_cols:
+                values.append(col_tuple[0])
+
+    # 한 줄을 고르면 그 칸의 원본 행을 드릴다운으로 보여준다
+    event = st.dataframe(pivot, on_select="rerun", selection_mode="single-row", key=f"as_summary_{title}")
+
+    chart_cols = values.copy()
+    if chart_use_avg_col:
+        chart_cols = [v if v != chart_use_avg_col[0] else chart_use_avg_col[1] for v in values]
+
+    if len(chart_cols) == 1:
+        fig = px.bar(
+            pivot,
+            x='담당자_년월',
+            y=chart_cols[0],
+            labels={'담당자_년월': '담당자 및 년월', chart_cols[0]: y_label},
+            title=title,
+            text=chart_cols[0]
+        )
+    else:
+        melted = pivot.melt(id_vars='담당자_년월', value_vars=chart_cols, var_name='항목', value_name='값')
+        fig = px.bar(
+            melted,
+            x='담당자_년월',
+            y='값',
+            color='항목',
+            barmode='group',
+            labels={'담당자_년월': '담당자 및 년월', '값': y_label},
+            title=title,
+            text='값'
+        )
+
+    fig.update_traces(textposition='outside', textfont_size=12)
+    fig.update_layout(uniformtext_minsize=10, uniformtext_mode='hide')
+    st.plotly_chart(fig, use_container_width=True)
+    return event
+
+
+def prepare(df):
+    # 종결 건만 남기고 접수/종료 년월, 진행상태, 조치일/미조치일을 붙인 원본 (필터링_원본결과 시트)
+    df = df[df['전자결재번호상태'] == '종결']
+    df['AS접수일자'] = pd.to_datetime(df['AS접수일자'], errors='coerce')
+    df['기술적종료일자'] = pd.to_datetime(df['기술적종료일자'], errors='coerce')
+    today = pd.to_datetime(datetime.today().date())
+
+    df['AS접수년월'] = df['AS접수일자'].dt.strftime('%Y%m')
+    df['기술적종료년월'] = df['기술적종료일자'].dt.strftime('%Y%m')
+
+    def classify_status(s):
+        if s in ['접수', '조치중']:
+            return '조치중'
+        elif s in ['기술적종료', '공사완료', '최종완료']:
+            return '조치완료'
+        return '기타'
+
+    df['진행상태'] = df['AS진행상태'].apply(classify_status)
+    df['당월조치대상'] = np.where(df['AS접수년월'] == df['기술적종료년월'], 'O', 'X')
+    df['조치일'] = (df['기술적종료일자'] - df['AS접수일자']).dt.days
+    df['미조치일'] = np.where(df['기술적종료일자'].isna(), (today - df['AS접수일자']).dt.days, np.nan)
+    return df
+
+
+def select_rows(df, rows):
+    # 보고서 설정의 rows 이름 → 집계 대상 행
+    if rows == "건수":
+        # 원본 컬럼은 공유하고 건수 컬럼만 붙인다
+        return df.assign(
+            조치완료건수=np.where(df['진행상태'] == '조치완료', 1, 0),
+            조치중건수=np.where(df['진행상태'] == '조치중', 1, 0),
+        )
+    if rows in ("조치완료", "조치중"):
+        return df[df['진행상태'] == rows]
+    if rows == "당월조치대상":
+        return df[df['당월조치대상'] == 'O']
+    return df
+
+
+def build(df):
+    df = prepare(df)
+    reports = {'필터링_원본결과': df}
+    for report in REPORTS:
+        reports[report["sheet_name"]] = generate_report(select_rows(df, report["rows"]), **report)
+    return reports
+
+
+def record_sketches(df, sha):
+    # 조치완료 건의 조치일, 조치중 건의 미조치일 히스토그램을 분위수 저장소에 반영한다 (같은 파일은 한 번만)
+    # df: prepare() 결과. 파일 기준일은 접수일자/기술적종료일자 중 가장 늦은 날 (예전 파일이 최신 이력을 덮어쓰지 않게)
+    if percentiles.has(sha):
+        return
+    sketches = pd.concat([
+        percentiles.histogram(select_rows(df, "조치완료"), "조치일", "조치일"),
+        percentiles.histogram(select_rows(df, "조치중"), "미조치일", "미조치일"),
+    ], ignore_index=True)
+    as_of = df[['AS접수일자', '기술적종료일자']].max().max()
+    percentiles.update(sha, sketches, as_of if pd.notna(as_of) else datetime.today())
+
+
+def show_percentiles():
+    # ✅ 지금까지 올린 파일로 쌓은 월별 히스토그램을 합쳐 담당자별 조치일/미조치일 분위수를 보여준다
+    data = percentiles.load()
+    if data.empty:
+        return
+    st.markdown("## ⏱️ 담당자별 조치일/미조치일 분위수 (누적 이력)")
+    col1, col2 = st.columns(2)
+    with col1:
+        지표 = st.selectbox("지표", ["조치일", "미조치일"], key="percentile_지표")
+    with col2:
+        기간 = st.selectbox("기간 단위", list(percentiles.PERIODS), key="percentile_기간")
+    data = data[data['지표'] == 지표]
+    if data.empty:
+        st.info("선택한 지표의 이력이 없습니다.")
+        return
+    table = percentiles.quantiles(percentiles.by_period(data, 기간), ['기간'] + percentiles.KEYS)
+    table = table.drop(columns='지표').sort_values(['기간'] + percentiles.KEYS, ascending=[False] + [True] * len(percentiles.KEYS))
+    st.dataframe(table, use_container_width=True, hide_index=True)
+    overall = percentiles.quantiles(percentiles.by_period(data, 기간), ['기간']).drop(columns='지표')
+    fig = px.line(overall, x='기간', y=list(percentiles.QUANTILES), markers=True, title=f'{기간}별 전체 {지표} 분위수', labels={'value': '일수', 'variable': '분위수'})
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"반영된 파일 {len(percentiles.sources())}개 · 분위수는 건수 기준 (p90: 90% 의 건이 그 일수 이하)")
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _cases(fingerprint, today, _base):
+    # 데이터셋 버전 + 기준일마다 한 번만 건별 처리일수를 계산해 정렬해 두고 모든 세션이 함께 쓴다
+    # (미종료 건의 일수는 기준일까지이므로 날짜가 바뀌면 다시 계산한다)
+    return survival.cases(_base.assign(제품군=AS_PROCESS.classify_product_group(_base)), today)
+
+
+@st.fragment
+def show_survival(version, base):
+    # ✅ 코호트별 처리기간 곡선과 미종료 건 경과일수. 조건을 바꾸면 이 부분만 다시 그린다
+    # 제품군 분류에 쓰는 컬럼이 없는 파일이면 곡선만 건너뛰고 나머지 보고서는 그대로 보여준다
+    missing = [col for col in ['AS접수번호', '제품군1', '제품군2'] if col not in base.columns]
+    if missing:
+        st.warning(f"⚠️ 파일에 {', '.join(missing)} 컬럼이 없어 처리기간 곡선을 그리지 않습니다.")
+        return
+    data = _cases(version, pd.to_datetime(datetime.today().date()), base)
+    if data.empty:
+        return
+    st.markdown("## ⏳ 처리기간 곡선 (접수 후 N일 내 종료 비율)")
+    months = sorted(data['접수년월'].unique())
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        by = st.multiselect("코호트", list(survival.COHORTS), default=["접수년월"], key="survival_by")
+        max_days = st.slider("최대 일수", 30, 730, 365, step=30, key="survival_days")
+    with col2:
+        제품군 = st.multiselect("제품군 (비우면 전체)", sorted(data['제품군'].unique()), key="survival_제품군")
+        담당자 = st.multiselect("담당자 (비우면 전체)", sorted(data['접수담당자'].unique()), key="survival_담당자")
+    with col3:
+        start, end = st.select_slider("접수년월", options=months, value=(months[0], months[-1]), key="survival_months")
+
+    mask = data['접수년월'].between(start, end)
+    if 제품군:
+        mask &= data['제품군'].isin(제품군)
+    if 담당자:
+        mask &= data['접수담당자'].isin(담당자)
+    data = data[mask]
+    if data.empty:
+        st.info("선택한 조건의 AS 건이 없습니다.")
+        return
+
+    by = [survival.COHORTS[name] for name in by]
+    curve = survival.curves(data, by, max_days)
+    plotted = survival.largest(curve)
+    fig = px.line(
+        plotted, x='일수', y='종료비율(%)', color='코호트', hover_data=['관측건수'],
+        labels={'일수': '접수 후 일수'}, title='접수 후 N일 내 종료 비율 (미종료 건은 기준일까지 관측)'
+    )
+    fig.update_yaxes(range=[0, 100])
+    st.plotly_chart(fig, use_container_width=True)
+    if len(plotted) < len(curve):
+        st.caption(f"코호트가 많아 건수가 많은 {survival.MAX_PLOTTED}개만 그렸습니다. 아래 표에는 모든 코호트가 있습니다.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### 기간별 종료 비율(%)")
+        st.dataframe(survival.milestones(curve, by), use_container_width=True)
+    with col2:
+        st.markdown("#### 미종료 건 경과일수")
+        st.dataframe(survival.aging(data, by), use_container_width=True)
+    st.caption(f"대상 {len(data):,}건 (미종료 {int((~data['종료']).sum()):,}건)")
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _report(fingerprint, sheet_name, _base):
+    report = next(r for r in REPORTS if r["sheet_name"] == sheet_name)
+    return generate_report(select_rows(_base, report["rows"]), **report)
+
+
+class LazyReports(Mapping):
+    # 시트 이름 → 결과표. 보고서는 처음 꺼낼 때(탭을 열거나 전체 다운로드할 때) 계산하고 데이터셋 버전별로 기억한다
+    def __init__(self, fingerprint, base):
+        self.fingerprint = fingerprint
+        self.base = base
+
+    def __getitem__(self, sheet_name):
+        if sheet_name == '필터링_원본결과':
+            return self.base
+        return _report(self.fingerprint, sheet_name, self.base)
+
+    def __iter__(self):
+        return iter(['필터링_원본결과'] + [report["sheet_name"] for report in REPORTS])
+
+    def __len__(self):
+        return len(REPORTS) + 1
+
+
+def to_excel(reports):
+    output_all = io.BytesIO()
+    with pd.ExcelWriter(output_all, engine='xlsxwriter') as writer:
+        for sheet, data in reports.items():
+            sheet_name = sheet[:31]
+            data.to_excel(writer, index=False, sheet_name=sheet_name)
+    return output_all.getvalue()
+
+
+def app():
+    st.set_page_config(layout="wide")
+    st.title("📊 AS 접수/조치/조치일 집계 시스템")
+
+    # 안내 문구 (uc81c목 바로 아래)
+    st.markdown("""
+    <p style='font-size:24px; color:red;'>
+    ※ 업로드할 파일은 ERP의 
+    <span style='color:blue; font-weight:bold;'>"AS현황 및 최종완료"</span>
+    에서 다운 받은 파일을 업로드하세요!
+    </p>
+    """, unsafe_allow_html=True)
+
+    # 파일을 올리지 않았으면 예약 집계 결과를 보여준다
+    df = datasets.load("AS현황", "엑셀 파일을 업로드하세요.", header=0)
+    if df is None:
+        served = reports.serve("AS_summary", INPUTS)
+        if served is None:
+            show_percentiles()
+            return
+        results, excel_data, version = served["results"], served["xlsx"], served["version"]
+        budget.track("AS_summary 집계", results)
+    else:
+        # 원본 정리(prepare)는 서버 작업 대기열에서 데이터셋 버전마다 한 번 (다른 세션과 결과 공유)
+        # 보고서는 탭을 처음 열 때 계산한다. 엑셀은 다운로드를 누를 때 아직 계산하지 않은 보고서까지 만들어 묶는다
+        version = datasets.fingerprint(*INPUTS)
+        base = jobs.prepare("AS_summary", version, df)
+        record_sketches(base, version)
+        results = LazyReports(version, base)
+        excel_data = lambda: to_excel(results)
+        budget.track("AS_summary 집계", base)
+
+    # 선택한 탭의 보고서만 그린다
+    tabs = st.tabs([report["title"] for report in REPORTS], key="as_summary_tab", on_change="rerun")
+    for tab, report in zip(tabs, REPORTS):
+        if tab.open:
+            with tab:
+                pivot = results[report["sheet_name"]]
+                selected = draw_report(pivot, **report).selection.rows
+                if selected:
+                    row = pivot.iloc[selected[0]]
+                    source = results['필터링_원본결과']
+                    numbers = drilldown.cell(
+                        version, report["sheet_name"], select_rows(source, report["rows"]),
+                        ['접수담당자', 'AS접수년월'], [row['접수담당자'], row['AS접수년월']]
+                    )
+                    sources = {'필터링_원본결과': (version, source), **drilldown.linked(exclude=INPUTS)}
+                    drilldown.show(row['담당자_년월'], numbers, sources)
+
+    # 전체 엘셀 다운로드
+    st.markdown("### 📦 전체 보고서 통합 다운로드")
+    st.download_button("📅 전체 집계 결과 엘셀 다운로드", excel_data, file_name="AS_분석_보고서.xlsx")
+    downloads.stream_buttons(results, "AS_분석_보고서", key="as_summary")
+
+    show_survival(version, results['필터링_원본결과'])
+    show_percentiles()
+
+
+if __name__ == "__main__":
+    app()
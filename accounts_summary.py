@@ -1,190 +1,272 @@
-import streamlit as st
-import pandas as pd
-import numpy as np
-from io import BytesIO
-from datetime import datetime
-import plotly.graph_objects as go
-
-st.set_page_config(page_title='AS채권현황 분석 및 점검 시스템')
-st.title('AS채권현황 분석 및 점검 시스템')
-
-st.markdown(
-    '<div style="font-size:18px; color:red;">※ 업로드할 파일은 ERP의 <span style="color:blue;">AS현황 및 최종완료</span>에서 다운 받은 파일을 업로드하세요!</div>',
-    unsafe_allow_html=True
-)
-st.markdown(
-    '<div style="font-size:18px; color:red;">※ 업로드할 파일은 ERP의 <span style="color:blue;">AS비용현황</span>에서 다운 받은 파일을 업로드하세요!</div>',
-    unsafe_allow_html=True
-)
-
-as_status_file = st.file_uploader("AS현황 및 최종완료 파일 업로드", type=["xlsx"])
-as_cost_file = st.file_uploader("AS비용현황 파일 업로드", type=["xlsx"])
-
-if as_status_file and as_cost_file:
-    today = pd.to_datetime(datetime.today().date())
-
-    df_status = pd.read_excel(as_status_file)
-    df_status = df_status.dropna(subset=['AS접수번호'])
-    df_status = df_status[df_status['전자결재번호상태'] == '종결']
-    status_map = df_status.set_index('AS접수번호')[['전자결재번호상태', '발주처명']]
-
-    df_cost = pd.read_excel(as_cost_file, skiprows=[1])
-    df_cost = df_cost[(df_cost['AS구분'] != '무상') & df_cost['AS구분'].notna()]
-    df_cost = df_cost[~df_cost['진행상태'].isin(['접수취소', '최종완료'])]
-    df_cost = df_cost[df_cost['입금상태'] != '입금완료']
-
-    df_cost = df_cost.merge(status_map, how='inner', left_on='AS접수번호', right_index=True)
-
-    def assign_category(row):
-        if row['청구상태'] == '청구완료':
-            return '청구'
-        elif row['진행상태'] in ['기술적종료', '공사완료'] and row['청구상태'] in ['미청구', '부분청구']:
-            return '미청구'
-        elif row['진행상태'] in ['접수', '조치중']:
-            return 'AS진행'
-        else:
-            return '미구분'
-
-    df_cost['구분'] = df_cost.apply(assign_category, axis=1)
-
-    df_cost['인보이스발행일자'] = df_cost.apply(
-        lambda row: row['청구일자'] if pd.isna(row['인보이스발행일자']) and row['구분'] == '청구' else row['인보이스발행일자'],
-        axis=1
-    )
-
-    def assign_type(row):
-        if row['구분'] == '청구' and pd.notna(row['인보이스발행일자']):
-            days = (today - pd.to_datetime(row['인보이스발행일자'])).days
-            if days <= 30:
-                return '정상(미입금)'
-            elif days <= 60:
-                return '입금지연_30일 경과'
-            elif days <= 90:
-                return '입금지연_60일 경과'
-            elif days <= 120:
-                return '입금지연_90일 경과'
-            else:
-                return '입금지연_120일 경과'
-        elif row['구분'] == '미청구' and pd.notna(row['기술적종료일자']):
-            days = (today - pd.to_datetime(row['기술적종료일자'])).days
-            return '정상(미청구)' if days <= 60 else '청구지연'
-        elif row['구분'] == 'AS진행':
-            days = (today - pd.to_datetime(row['접수일자'])).days
-            if row['진행상태'] == '조치중' or days <= 180:
-                return 'AS조치중'
-            else:
-                return '조치지연'
-        return None
-
-    df_cost['유형'] = df_cost.apply(assign_type, axis=1)
-
-    def calc_balance(row):
-        if row['유형'] in ['입금지연_30일 경과', '입금지연_60일 경과', '입금지연_90일 경과', '입금지연_120일 경과']:
-            return row['청구금액(원화)'] - row['입금액(원화)']
-        return 0
-
-    df_cost['미입금잔액'] = df_cost.apply(calc_balance, axis=1)
-
-    order = ['AS진행', '미청구', '청구', '합계']
-    type_order = [
-        'AS조치중', '조치지연', '정상(미청구)', '청구지연',
-        '정상(미입금)', '입금지연_30일 경과', '입금지연_60일 경과', '입금지연_90일 경과', '입금지연_120일 경과', '-'
-    ]
-
-    pivot = df_cost.pivot_table(
-        index=['구분', '유형'],
-        values=['AS접수번호', '미입금잔액', '도급금(원화)', '청구금액(원화)'],
-        aggfunc={'AS접수번호': 'count', '미입금잔액': 'sum', '도급금(원화)': 'sum', '청구금액(원화)': 'sum'},
-        fill_value=0
-    ).reset_index()
-
-    total_row = pd.DataFrame({
-        '구분': ['합계'],
-        '유형': ['-'],
-        'AS접수번호': [pivot['AS접수번호'].sum()],
-        '미입금잔액': [pivot['미입금잔액'].sum()],
-        '도급금(원화)': [pivot['도급금(원화)'].sum()],
-        '청구금액(원화)': [pivot['청구금액(원화)'].sum()]
-    })
-
-    pivot = pd.concat([pivot, total_row], ignore_index=True)
-    pivot['구분'] = pd.Categorical(pivot['구분'], categories=order, ordered=True)
-    pivot['유형'] = pd.Categorical(pivot['유형'], categories=type_order, ordered=True)
-    pivot = pivot.sort_values(['구분', '유형']).reset_index(drop=True)
-
-    formatted = pivot.copy()
-    for col in ['AS접수번호', '도급금(원화)', '미입금잔액', '청구금액(원화)']:
-        formatted[col] = formatted[col].apply(lambda x: f"{int(x):,}")
-
-    st.subheader("AS채권현황 요약 집계표")
-    st.dataframe(formatted)
-
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df_cost.to_excel(writer, index=False, sheet_name='AS채권현황 점검 결과')
-        pivot.to_excel(writer, index=False, sheet_name='AS채권현황 요약 집계표')
-    st.download_button(
-        label="AS채권현황 점검 결과 다운로드",
-        data=output.getvalue(),
-        file_name="AS채권현황_점검결과.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-
-    # 차트 생성
-    chart_definitions = {
-        'AS조치중': '도급금(원화)',
-        '조치지연': '도급금(원화)',
-        '정상(미청구)': '도급금(원화)',
-        '청구지연': '도급금(원화)',
-        '정상(미입금)': '청구금액(원화)'
-    }
-
-    chart_data = []
-    for k, v in chart_definitions.items():
-        row = pivot[pivot['유형'] == k]
-        if not row.empty:
-            chart_data.append({
-                '유형': k,
-                '건수': int(row['AS접수번호'].values[0]),
-                '금액': int(row[v].values[0])
-            })
-
-    delay_types = ['입금지연_30일 경과', '입금지연_60일 경과', '입금지연_90일 경과', '입금지연_120일 경과']
-    delay_rows = pivot[pivot['유형'].isin(delay_types)]
-    if not delay_rows.empty:
-        chart_data.append({
-            '유형': '입금지연합계',
-            '건수': int(delay_rows['AS접수번호'].sum()),
-            '금액': int(delay_rows['미입금잔액'].sum())
-        })
-
-    chart_df = pd.DataFrame(chart_data)
-    fig = go.Figure()
-
-    fig.add_trace(go.Bar(
-        x=chart_df['유형'],
-        y=chart_df['건수'],
-        name='건수',
-        text=[f"{x:,}" for x in chart_df['건수']],
-        textposition='outside',
-        marker_color='deepskyblue'
-    ))
-    fig.add_trace(go.Bar(
-        x=chart_df['유형'],
-        y=chart_df['금액'],
-        name='금액',
-        text=[f"{x:,}" for x in chart_df['금액']],
-        textposition='outside',
-        marker_color='lightblue'
-    ))
-
-    fig.update_layout(
-        title='AS채권현황 요약 차트 (요약 기준)',
-        barmode='group',
-        xaxis_title='유형',
-        yaxis_title='합계',
-        uniformtext_minsize=8,
-        uniformtext_mode='hide',
-        margin=dict(l=40, r=40, t=60, b=120)
-    )
-    st.plotly_chart(fig, use_container_width=True)
+import streamlit as st
+import pandas as pd
+import numpy as np
+from io import BytesIO
+from datetime import datetime
+import plotly.graph_objects as go
+
+import budget
+import datasets
+import downloads
+import drilldown
+import jobs
+import ledger
+import reports
+
+INPUTS = ["AS현황", "AS비용현황"]
+
+
+def build(df_status, df_cost):
+    today = pd.to_datetime(datetime.today().date())
+
+    df_status = df_status.dropna(subset=['AS접수번호'])
+    df_status = df_status[df_status['전자결재번호상태'] == '종결']
+    status_map = df_status.set_index('AS접수번호')[['전자결재번호상태', '발주처명']]
+
+    df_cost = df_cost[(df_cost['AS구분'] != '무상') & df_cost['AS구분'].notna()]
+    df_cost = df_cost[~df_cost['진행상태'].isin(['접수취소', '최종완료'])]
+    df_cost = df_cost[df_cost['입금상태'] != '입금완료']
+
+    df_cost = df_cost.merge(status_map, how='inner', left_on='AS접수번호', right_index=True)
+
+    def assign_category(row):
+        if row['청구상태'] == '청구완료':
+            return '청구'
+        elif row['진행상태'] in ['기술적종료', '공사완료'] and row['청구상태'] in ['미청구', '부분청구']:
+            return '미청구'
+        elif row['진행상태'] in ['접수', '조치중']:
+            return 'AS진행'
+        else:
+            return '미구분'
+
+    df_cost['구분'] = df_cost.apply(assign_category, axis=1)
+
+    df_cost['인보이스발행일자'] = df_cost.apply(
+        lambda row: row['청구일자'] if pd.isna(row['인보이스발행일자']) and row['구분'] == '청구' else row['인보이스발행일자'],
+        axis=1
+    )
+
+    def assign_type(row):
+        if row['구분'] == '청구' and pd.notna(row['인보이스발행일자']):
+            days = (today - pd.to_datetime(row['인보이스발행일자'])).days
+            if days <= 30:
+                return '정상(미입금)'
+            elif days <= 60:
+                return '입금지연_30일 경과'
+            elif days <= 90:
+                return '입금지연_60일 경과'
+            elif days <= 120:
+                return '입금지연_90일 경과'
+            else:
+                return '입금지연_120일 경과'
+        elif row['구분'] == '미청구' and pd.notna(row['기술적종료일자']):
+            days = (today - pd.to_datetime(row['기술적종료일자'])).days
+            return '정상(미청구)' if days <= 60 else '청구지연'
+        elif row['구분'] == 'AS진행':
+            days = (today - pd.to_datetime(row['접수일자'])).days
+            if row['진행상태'] == '조치중' or days <= 180:
+                return 'AS조치중'
+            else:
+                return '조치지연'
+        return None
+
+    df_cost['유형'] = df_cost.apply(assign_type, axis=1)
+
+    def calc_balance(row):
+        if row['유형'] in ['입금지연_30일 경과', '입금지연_60일 경과', '입금지연_90일 경과', '입금지연_120일 경과']:
+            return row['청구금액(원화)'] - row['입금액(원화)']
+        return 0
+
+    df_cost['미입금잔액'] = df_cost.apply(calc_balance, axis=1)
+
+    order = ['AS진행', '미청구', '청구', '합계']
+    type_order = [
+        'AS조치중', '조치지연', '정상(미청구)', '청구지연',
+        '정상(미입금)', '입금지연_30일 경과', '입금지연_60일 경과', '입금지연_90일 경과', '입금지연_120일 경과', '-'
+    ]
+
+    pivot = df_cost.pivot_table(
+        index=['구분', '유형'],
+        values=['AS접수번호', '미입금잔액', '도급금(원화)', '청구금액(원화)'],
+        aggfunc={'AS접수번호': 'count', '미입금잔액': 'sum', '도급금(원화)': 'sum', '청구금액(원화)': 'sum'},
+        fill_value=0
+    ).reset_index()
+
+    total_row = pd.DataFrame({
+        '구분': ['합계'],
+        '유형': ['-'],
+        'AS접수번호': [pivot['AS접수번호'].sum()],
+        '미입금잔액': [pivot['미입금잔액'].sum()],
+        '도급금(원화)': [pivot['도급금(원화)'].sum()],
+        '청구금액(원화)': [pivot['청구금액(원화)'].sum()]
+    })
+
+    pivot = pd.concat([pivot, total_row], ignore_index=True)
+    pivot['구분'] = pd.Categorical(pivot['구분'], categories=order, ordered=True)
+    pivot['유형'] = pd.Categorical(pivot['유형'], categories=type_order, ordered=True)
+    pivot = pivot.sort_values(['구분', '유형']).reset_index(drop=True)
+
+    return {'AS채권현황 점검 결과': df_cost, 'AS채권현황 요약 집계표': pivot}
+
+
+def to_excel(results):
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        results['AS채권현황 점검 결과'].to_excel(writer, index=False, sheet_name='AS채권현황 점검 결과')
+        results['AS채권현황 요약 집계표'].to_excel(writer, index=False, sheet_name='AS채권현황 요약 집계표')
+    return output.getvalue()
+
+
+# ✅ 스냅샷 이력: 건별로 남길 항목 (유형은 집계한 날 기준)
+SNAPSHOT_COLS = ['AS접수번호', '구분', '유형', '미입금잔액', '도급금(원화)', '청구금액(원화)']
+DELAY_TYPES = ['입금지연_30일 경과', '입금지연_60일 경과', '입금지연_90일 경과', '입금지연_120일 경과']
+
+
+def record_snapshot(results, sha):
+    return ledger.record("AS채권현황", sha, results['AS채권현황 점검 결과'][SNAPSHOT_COLS], ['AS접수번호'])
+
+
+def delay_summary(state, as_of):
+    delayed = state[state['유형'].isin(DELAY_TYPES)]
+    return delayed.groupby(pd.Categorical(delayed['유형'], categories=DELAY_TYPES), observed=False)['미입금잔액'].sum()
+
+
+def show_trend():
+    # ✅ 지금까지 집계한 스냅샷으로 입금지연 유형별 미입금잔액 추이를 보여준다
+    trend = ledger.trend("AS채권현황", delay_summary)
+    if trend.empty:
+        return
+    st.subheader("입금지연 유형별 미입금잔액 추이 (스냅샷 이력)")
+    fig = go.Figure()
+    for col in DELAY_TYPES:
+        fig.add_trace(go.Bar(x=trend.index, y=trend[col], name=col))
+    fig.update_layout(barmode='stack', xaxis_title='스냅샷일자', yaxis_title='미입금잔액', height=450)
+    st.plotly_chart(fig, use_container_width=True)
+    stats = ledger.stats("AS채권현황")
+    st.caption(f"스냅샷 {stats['snapshots']}개 · 변경분 저장 용량 {stats['bytes'] / 1024:,.0f}KB")
+
+
+def app():
+    st.set_page_config(page_title='AS채권현황 분석 및 점검 시스템')
+    st.title('AS채권현황 분석 및 점검 시스템')
+
+    st.markdown(
+        '<div style="font-size:18px; color:red;">※ 업로드할 파일은 ERP의 <span style="color:blue;">AS현황 및 최종완료</span>에서 다운 받은 파일을 업로드하세요!</div>',
+        unsafe_allow_html=True
+    )
+    st.markdown(
+        '<div style="font-size:18px; color:red;">※ 업로드할 파일은 ERP의 <span style="color:blue;">AS비용현황</span>에서 다운 받은 파일을 업로드하세요!</div>',
+        unsafe_allow_html=True
+    )
+
+    # 두 파일을 모두 올리지 않았으면 예약 집계 결과를 보여준다
+    df_status = datasets.load("AS현황", "AS현황 및 최종완료 파일 업로드", header=0)
+    df_cost = datasets.load("AS비용현황", "AS비용현황 파일 업로드")
+    if df_status is None or df_cost is None:
+        served = reports.serve("accounts_summary", INPUTS)
+        if served is None:
+            show_trend()
+            return
+        results, excel_data, version = served["results"], served["xlsx"], served["version"]
+    else:
+        # 분류/집계와 엑셀 생성은 서버 작업 대기열에서 (같은 파일이면 다른 세션과 결과 공유)
+        # 절약 모드에서는 AS현황에서 대조에 쓰는 컬럼만 작업 프로세스로 넘긴다 (결과는 같다)
+        df_status = budget.project(df_status, ['AS접수번호', '전자결재번호상태', '발주처명'])
+        version = datasets.fingerprint(*INPUTS)
+        results, excel_data = jobs.build("accounts_summary", version, df_status, df_cost)
+        record_snapshot(results, version)
+    budget.track("AS채권현황 집계", results)
+    pivot = results['AS채권현황 요약 집계표']
+
+    st.subheader("AS채권현황 요약 집계표")
+    # 건수/금액은 숫자 그대로 넘기고 화면에서만 천 단위 구분으로 보여준다
+    # 한 줄을 고르면 그 구분 × 유형에 들어간 원본 행을 드릴다운으로 보여준다
+    event = st.dataframe(
+        pivot,
+        column_config={
+            col: st.column_config.NumberColumn(format="%,d") for col in ['AS접수번호', '도급금(원화)', '미입금잔액', '청구금액(원화)']
+        },
+        on_select="rerun", selection_mode="single-row", key="accounts_summary_pivot",
+    )
+    if event.selection.rows:
+        row = pivot.iloc[event.selection.rows[0]]
+        checked = results['AS채권현황 점검 결과']
+        if row['구분'] == '합계':
+            numbers = pd.unique(checked['AS접수번호'].astype(str))
+        else:
+            numbers = drilldown.cell(version, 'AS채권현황 요약 집계표', checked, ['구분', '유형'], [row['구분'], row['유형']])
+        sources = {'AS채권현황 점검 결과': (version, checked), **drilldown.linked(exclude=['AS비용현황'])}
+        drilldown.show(f"{row['구분']} × {row['유형']}", numbers, sources)
+
+    st.download_button(
+        label="AS채권현황 점검 결과 다운로드",
+        data=excel_data,
+        file_name="AS채권현황_점검결과.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    downloads.stream_buttons(results, "AS채권현황_점검결과", key="accounts_summary")
+
+    # 차트 생성
+    chart_definitions = {
+        'AS조치중': '도급금(원화)',
+        '조치지연': '도급금(원화)',
+        '정상(미청구)': '도급금(원화)',
+        '청구지연': '도급금(원화)',
+        '정상(미입금)': '청구금액(원화)'
+    }
+
+    chart_data = []
+    for k, v in chart_definitions.items():
+        row = pivot[pivot['유형'] == k]
+        if not row.empty:
+            chart_data.append({
+                '유형': k,
+                '건수': int(row['AS접수번호'].values[0]),
+                '금액': int(row[v].values[0])
+            })
+
+    delay_types = ['입금지연_30일 경과', '입금지연_60일 경과', '입금지연_90일 경과', '입금지연_120일 경과']
+    delay_rows = pivot[pivot['유형'].isin(delay_types)]
+    if not delay_rows.empty:
+        chart_data.append({
+            '유형': '입금지연합계',
+            '건수': int(delay_rows['AS접수번호'].sum()),
+            '금액': int(delay_rows['미입금잔액'].sum())
+        })
+
+    chart_df = pd.DataFrame(chart_data)
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=chart_df['유형'],
+        y=chart_df['건수'],
+        name='건수',
+        text=[f"{x:,}" for x in chart_df['건수']],
+        textposition='outside',
+        marker_color='deepskyblue'
+    ))
+    fig.add_trace(go.Bar(
+        x=chart_df['유형'],
+        y=chart_df['금액'],
+        name='금액',
+        text=[f"{x:,}" for x in chart_df['금액']],
+        textposition='outside',
+        marker_color='lightblue'
+    ))
+
+    fig.update_layout(
+        title='AS채권현황 요약 차트 (요약 기준)',
+        barmode='group',
+        xaxis_title='유형',
+        yaxis_title='합계',
+        uniformtext_minsize=8,
+        uniformtext_mode='hide',
+        margin=dict(l=40, r=40, t=60, b=120)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    show_trend()
+
+
+if __name__ == "__main__":
+    app()
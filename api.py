@@ -0,0 +1,299 @@
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pandas as pd
+
+import AS_PROCESS
+import AS_SALES
+import Accounts
+import PRPO
+import datasets
+import pipeline
+import project
+import scheduler
+
+# ✅ 보고서 조회 API (로컬 HTTP/JSON)
+# BI 대시보드가 엑셀 다운로드를 긁어 가는 대신, inbox 의 종류별 최신 ERP 파일을 한 번 읽어 메모리에 두고
+# 처리율 / 매출 집계 / 채권 aging / 발주·입고지연 / 프로젝트 선정 표를 파라미터별로 바로 돌려준다.
+# 같은 파일·같은 파라미터의 결과는 단계 결과 저장소(pipeline)에서 다시 꺼내므로 반복 질의는 계산하지 않는다.
+#   GET  /reports  보고서 목록과 파라미터 기본값
+#   POST /query    {"report": "매출", "params": {"담당자": "전체", "제품군": "BWMS"}}
+#   POST /batch    {"queries": [{"report": ..., "params": ...}, ...]} → 질의마다 결과 또는 오류
+# 파라미터가 잘못되면 400, 데이터가 없으면 409, 보고서 계산 중 오류는 500 (배치에서는 질의마다 따로)
+#   POST /reload   inbox 다시 읽기 (바뀐 파일만)
+# 실행: python api.py [포트]
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_BATCH = 200
+
+_lock = threading.Lock()
+_data = {"frames": {}, "sources": {}, "loaded": None}
+
+api = pipeline.Pipeline("api")
+
+
+class ParamError(ValueError):
+    # 질의 파라미터가 잘못됨 (400). 보고서 계산 중 생긴 다른 오류와 구분한다
+    pass
+
+
+def load():
+    # inbox 의 종류별 최신 파일을 읽는다 (Parquet 스냅샷이 있으면 그대로 쓰고, 지난번과 같은 파일은 다시 읽지 않는다)
+    sources, paths = scheduler.inbox_sources()
+    with _lock:
+        frames, loaded = dict(_data["frames"]), _data["sources"]
+    for key, path in paths.items():
+        if key not in frames or loaded.get(key, {}).get("sha") != sources[key]["sha"]:
+            frames[key] = datasets.read(key, path, sources[key]["sha"])
+    frames = {key: frames[key] for key in sources}
+    with _lock:
+        _data.update(frames=frames, sources=sources, loaded=time.time())
+    return {key: {"name": source["name"], "rows": len(frames[key])} for key, source in sources.items()}
+
+
+def _month(text, day):
+    # "YYYY-MM" → 그 달의 day 일
+    try:
+        year, month = (int(part) for part in text.split("-")[:2])
+        return datetime(year, month, day)
+    except ValueError:
+        raise ParamError(f"'{text}' 는 YYYY-MM 형식이 아닙니다.") from None
+
+
+def to_json(df):
+    # 표 → {"columns", "rows"}. 이름 있는 인덱스는 컬럼으로 풀고, 여러 줄 컬럼명은 " / " 로 잇는다
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+    if any(name is not None for name in df.index.names):
+        df = df.reset_index()
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.set_axis([" / ".join(str(part) for part in col if str(part)) for col in df.columns], axis=1)
+    return {
+        "columns": [str(col) for col in df.columns],
+        "rows": json.loads(df.to_json(orient="values", date_format="iso", force_ascii=False)),
+    }
+
+
+# ---------------------- 보고서 단계 ---------------------- #
+# 파일 하나당 한 번만 하는 가공(분류, 집계)은 따로 단계로 두고, 보고서 단계는 파라미터별 응답(JSON)까지 만들어 둔다
+
+@api.stage("AS현황", "시작", "종료")
+def 처리율(df, 시작, 종료):
+    start_ym = _month(시작, 1) if 시작 else datetime(1900, 1, 1)
+    end_ym = _month(종료, 28) if 종료 else datetime(2999, 12, 28)
+    result, _, _ = AS_PROCESS.process_data(df, start_ym, end_ym)
+    return to_json(result.drop(columns='접수년월_dt'))
+
+
+@api.stage("대금청구현황")
+def 미수채권(df):
+    df.columns = Accounts.clean_column_names(df.columns)
+    df = Accounts.prepare(df)
+    return df.assign(기준일자=Accounts.base_date(df))
+
+
+@api.stage("미수채권", "기준일", "구분")
+def 채권_aging(state, 기준일, 구분):
+    try:
+        as_of = pd.Timestamp(기준일) if 기준일 else pd.Timestamp(date.today())
+    except ValueError:
+        raise ParamError(f"'{기준일}' 는 날짜(YYYY-MM-DD)가 아닙니다.") from None
+    if 구분 and 구분 not in state.columns:
+        raise ParamError(f"'{구분}' 컬럼이 없습니다.")
+    return to_json(Accounts.aging_summary(state, as_of, 구분 or None))
+
+
+@api.stage("구매요청현황")
+def 발주입고(df):
+    return PRPO.build(df)
+
+
+@api.stage("발주입고", "표")
+def 발주입고지연(results, 표):
+    if 표 not in results:
+        raise ParamError(f"표는 {list(results)} 중 하나입니다.")
+    return to_json(results[표])
+
+
+@api.stage("프로젝트")
+def 프로젝트분류(df):
+    return project.build(df)
+
+
+@api.stage("프로젝트분류", "표")
+def 프로젝트선정(results, 표):
+    if 표 not in results:
+        raise ParamError(f"표는 {list(results)} 중 하나입니다.")
+    return to_json(results[표])
+
+
+def _pipeline(name):
+    def run(inputs, versions, params):
+        return api.run([name], versions, **inputs, **params)[0]
+    return run
+
+
+def _sales(inputs, versions, params):
+    # 매출 집계는 화면과 같은 AS_SALES 단계를 그대로 쓴다 (같은 파일이면 화면에서 계산한 결과도 함께 쓴다)
+    version = {"df": versions["AS프로젝트매출관리"]}
+    summary = AS_SALES.sales.run(["집계결과"], version, df=inputs["AS프로젝트매출관리"], 선택_담당자=params["담당자"], 선택_제품군=params["제품군"])[0]
+    return to_json(summary)
+
+
+# 보고서 이름 → 읽을 데이터셋(헤더 줄), 파라미터 기본값, 실행 함수
+REPORTS = {
+    "처리율": {"inputs": {"AS현황": 1}, "params": {"시작": "", "종료": ""}, "run": _pipeline("처리율")},
+    "매출": {"inputs": {"AS프로젝트매출관리": None}, "params": {"담당자": "전체", "제품군": "전체"}, "run": _sales},
+    "채권_aging": {"inputs": {"대금청구현황": None}, "params": {"기준일": "", "구분": ""}, "run": _pipeline("채권_aging")},
+    "발주입고지연": {"inputs": {"구매요청현황": None}, "params": {"표": "발주지연 요약"}, "run": _pipeline("발주입고지연")},
+    "프로젝트선정": {"inputs": {"프로젝트": None}, "params": {"표": "프로젝트 건수 요약표"}, "run": _pipeline("프로젝트선정")},
+}
+
+
+def answer(query):
+    # 질의 하나 → (HTTP 상태, 응답)
+    if not isinstance(query, dict) or query.get("report") not in REPORTS:
+        return 404, {"error": f"보고서는 {list(REPORTS)} 중 하나입니다."}
+    spec = REPORTS[query["report"]]
+    params = query.get("params") or {}
+    if not isinstance(params, dict):
+        return 400, {"error": "params 는 {이름: 문자열} 객체여야 합니다."}
+    not_text = sorted(name for name, value in params.items() if not isinstance(value, str))
+    if not_text:
+        return 400, {"error": f"파라미터 값은 문자열이어야 합니다: {not_text}"}
+    unknown = set(params) - set(spec["params"])
+    if unknown:
+        return 400, {"error": f"알 수 없는 파라미터: {sorted(unknown)} (가능: {list(spec['params'])})"}
+    params = {**spec["params"], **params}
+
+    with _lock:
+        frames, sources = _data["frames"], _data["sources"]
+    missing = [key for key in spec["inputs"] if key not in frames]
+    if missing:
+        return 409, {"error": f"{missing} 데이터가 없습니다. inbox 에 ERP 파일을 넣고 /reload 하세요."}
+    inputs = {key: datasets.view(frames[key], header) for key, header in spec["inputs"].items()}
+    versions = {key: sources[key]["sha"][:16] for key in spec["inputs"]}
+    try:
+        result = spec["run"](inputs, versions, params)
+    except ParamError as e:
+        return 400, {"error": f"파라미터 오류: {e}"}
+    except Exception as e:
+        return 500, {"error": f"보고서 계산 중 오류: {type(e).__name__}: {e}"}
+    return 200, {"report": query["report"], "params": params, "versions": versions, **result}
+
+
+def _answer(query):
+    # 예상하지 못한 오류도 이 질의 하나의 500 으로 돌려준다 (배치의 다른 질의와 HTTP 연결은 그대로)
+    try:
+        return answer(query)
+    except Exception as e:
+        return 500, {"error": f"서버 오류: {type(e).__name__}: {e}"}
+
+
+def handle(method, path, body=None):
+    # HTTP 서버와 LocalClient 가 함께 쓰는 요청 처리. (상태, 응답)
+    if method == "GET" and path == "/reports":
+        return 200, {name: {"inputs": list(spec["inputs"]), "params": spec["params"]} for name, spec in REPORTS.items()}
+    if method == "GET" and path == "/health":
+        with _lock:
+            return 200, {"loaded": _data["loaded"], "sources": _data["sources"]}
+    if method == "POST" and path == "/reload":
+        return 200, {"datasets": load()}
+    if method == "POST" and path == "/query":
+        return _answer(body)
+    if method == "POST" and path == "/batch":
+        queries = body.get("queries") if isinstance(body, dict) else None
+        if not isinstance(queries, list) or len(queries) > MAX_BATCH:
+            return 400, {"error": f"queries 는 {MAX_BATCH}개 이하의 목록이어야 합니다."}
+        results = []
+        for query in queries:
+            status, payload = _answer(query)
+            results.append({"status": status, **payload})
+        return 200, {"results": results}
+    return 404, {"error": f"{method} {path} 는 없는 경로입니다."}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _send(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._send(*handle("GET", urlparse(self.path).path))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            return self._send(400, {"error": "JSON 본문이 아닙니다."})
+        self._send(*handle("POST", urlparse(self.path).path, body))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Client:
+    # HTTP 로 API 를 부르는 클라이언트. 실패하면 RuntimeError(서버 오류 메시지)
+    def __init__(self, url=f"http://{HOST}:{PORT}"):
+        self.url = url.rstrip("/")
+
+    def _call(self, method, path, body=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(json.loads(e.read())["error"]) from None
+
+    def reports(self):
+        return self._call("GET", "/reports")
+
+    def reload(self):
+        return self._call("POST", "/reload", {})
+
+    def query(self, report, **params):
+        return self._call("POST", "/query", {"report": report, "params": params})
+
+    def batch(self, queries):
+        # queries: [(보고서, {파라미터}), ...] 또는 [{"report", "params"}, ...]
+        queries = [{"report": q[0], "params": q[1]} if isinstance(q, tuple) else q for q in queries]
+        return self._call("POST", "/batch", {"queries": queries})["results"]
+
+
+class LocalClient(Client):
+    # 서버를 띄우지 않고 같은 프로세스에서 handle() 을 바로 부르는 대역 (테스트/노트북용).
+    # 요청과 응답은 JSON 으로 한 번씩 바꿔 HTTP 로 부를 때와 같은 값만 오가게 한다
+    def __init__(self):
+        self.url = "local"
+
+    def _call(self, method, path, body=None):
+        body = json.loads(json.dumps(body, ensure_ascii=False)) if body is not None else None
+        status, payload = handle(method, path, body)
+        payload = json.loads(json.dumps(payload, ensure_ascii=False))
+        if status != 200:
+            raise RuntimeError(payload["error"])
+        return payload
+
+
+def serve(host=HOST, port=PORT):
+    print(f"datasets: {load()}")
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"report API: http://{host}:{port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    serve(port=int(sys.argv[1]) if len(sys.argv) > 1 else PORT)
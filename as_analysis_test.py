@@ -1,133 +1,227 @@
-import streamlit as st
-import pandas as pd
-from io import BytesIO
-
-def app():  # ✅ 여기에 전체 코드를 넣는 것이 핵심!
-    st.set_page_config(page_title="AS 상태 업데이트 및 결산 마감 대상 선정", layout="wide")
-
-    st.markdown(
-        "<h1 style='display: inline;'>📂 AS 상태 업데이트 및 결산 마감 대상 선정</h1> "
-        "<br><span style='color: red; font-size: 30px;'>※ 업로드할 파일은 ERP의 "
-        "<span style='color: blue;'><u>'AS현황 및 최종완료'</u></span>에서 다운 받은 파일을 업로드하세요!</span>",
-        unsafe_allow_html=True
-    )
-
-    uploaded_file = st.file_uploader("✅ 분석할 Excel 파일을 업로드하세요 (.xlsx)", type=["xlsx"])
-
-    if uploaded_file:
-        try:
-            df = pd.read_excel(uploaded_file, engine='openpyxl', header=[0, 1])
-        except Exception as e:
-            st.error(
-                f"""
-                ❌ 엑셀 파일을 열 수 없습니다.  
-                🔒 DRM(디지털 권한 관리)으로 보호된 파일일 수 있습니다.  
-                👉 오류 내용: {e}
-                """
-            )
-            st.stop()
-
-        df.columns = ['_'.join([str(i).strip() for i in col if pd.notna(i)]) for col in df.columns]
-
-        rename_dict = {
-            'AS접수번호_AS접수번호': 'AS접수번호',
-            '제목_제목': '제목',
-            'AS접수일자_AS접수일자': 'AS접수일자',
-            '인보이스발행일자_인보이스발행일자': '인보이스발행일자',
-            '전자결재번호상태_전자결재번호상태': '전자결재번호상태',
-            'AS진행상태_AS진행상태': 'AS진행상태',
-            'AS구분_AS구분': 'AS구분',
-            '청구상태_청구상태': '청구상태',
-            '입금상태_입금상태': '입금상태',
-            '접수담당자_접수담당자': '접수담당자',
-            '접수정보_투입자재계획': '투입자재계획',
-            '접수정보_외주계획': '외주계획',
-            '접수정보_기타계획': '기타계획',
-            '접수정보_출장계획': '출장계획',
-            '조치내역_투입자재계획': '투입자재계획.1',
-            '조치내역_외주계획': '외주계획.1',
-            '조치내역_기타계획': '기타계획.1',
-            '조치내역_출장계획': '출장계획.1',
-        }
-        df = df.rename(columns=rename_dict)
-
-        required_columns = ['전자결재번호상태', 'AS진행상태', 'AS구분', '청구상태', '입금상태']
-        missing_cols = [col for col in required_columns if col not in df.columns]
-        if missing_cols:
-            st.error(f"❗ 필수 컬럼 누락: {missing_cols}")
-            st.stop()
-
-        df = df[df['전자결재번호상태'] == '종결']
-        df = df[df['AS진행상태'].isin(['접수', '조치중', '기술적종료'])]
-        df = df[
-            (
-                df['AS구분'].isin(['유상', '위탁AS', '단품판매']) & (df['청구상태'] == '청구완료')
-            ) | (
-                df['AS구분'] == '무상'
-            )
-        ]
-
-        def match_rule3(row):
-            def is_O(*cols): return all(row.get(col) == 'O' for col in cols)
-            def is_X(*cols): return all(row.get(col) == 'X' for col in cols)
-            return any([
-                is_O('투입자재계획', '투입자재계획.1') and is_X('외주계획', '기타계획', '출장계획', '외주계획.1'),
-                is_O('투입자재계획', '기타계획', '투입자재계획.1') and is_X('외주계획', '출장계획', '외주계획.1'),
-                is_O('외주계획', '외주계획.1') and is_X('투입자재계획', '기타계획', '출장계획', '투입자재계획.1'),
-                row.get('기타계획') == 'O' and is_X('투입자재계획', '외주계획', '출장계획', '투입자재계획.1', '외주계획.1'),
-                is_O('기타계획', '출장계획') and is_X('투입자재계획', '외주계획', '투입자재계획.1', '외주계획.1'),
-                is_O('투입자재계획', '출장계획', '투입자재계획.1') and is_X('외주계획', '기타계획', '외주계획.1'),
-                is_O('투입자재계획', '외주계획', '투입자재계획.1', '외주계획.1') and is_X('기타계획', '출장계획'),
-                is_O('투입자재계획', '외주계획', '기타계획', '출장계획', '투입자재계획.1') and row.get('기타계획') == 'X',
-                row.get('출장계획') == 'O' and is_X('투입자재계획', '외주계획', '기타계획', '투입자재계획.1', '외주계획.1'),
-                is_O('외주계획', '출장계획', '외주계획.1') and is_X('투입자재계획', '기타계획', '투입자재계획.1'),
-                is_O('외주계획', '기타계획', '외주계획.1') and is_X('투입자재계획', '출장계획', '투입자재계획.1'),
-                is_O('투입자재계획', '외주계획', '기타계획', '출장계획', '투입자재계획.1', '외주계획.1'),
-                is_X('투입자재계획', '외주계획', '기타계획', '출장계획', '투입자재계획.1', '외주계획.1'),
-            ])
-        df = df[df.apply(match_rule3, axis=1)]
-
-        def generate_checklist(row):
-            if row['AS구분'] == '무상':
-                return "원가 투입 완료 여부 점검 / AS상태 업데이트 점검"
-            elif row['AS구분'] in ['유상', '단품판매'] and row['입금상태'] == '입금완료':
-                return "원가 투입 완료 여부 점검 / AS상태 업데이트 점검 / 최종완료 처리 점검"
-            elif row['AS구분'] in ['유상', '단품판매'] and row['입금상태'] in ['미입금', '부분입금']:
-                return "원가 투입 완료 여부 점검 / AS상태 업데이트 점검 / 공사완료 처리 점검"
-            else:
-                return ""
-
-        df['점검사항'] = df.apply(generate_checklist, axis=1)
-
-        st.sidebar.header("🧑‍💼 접수담당자 선택")
-        담당자_목록 = df['접수담당자'].dropna().unique().tolist()
-        selected_person = st.sidebar.selectbox("접수담당자를 선택하세요", options=["전체"] + 담당자_목록)
-
-        filtered_df = df if selected_person == "전체" else df[df['접수담당자'] == selected_person]
-
-        columns_to_save = [
-            'AS접수번호', '제목', 'AS접수일자', '인보이스발행일자', 'AS구분', 'AS진행상태',
-            '입금상태', '청구상태', '투입자재계획', '외주계획', '기타계획', '출장계획',
-            '투입자재계획.1', '외주계획.1', '기타계획.1', '출장계획.1', '접수담당자', '점검사항'
-        ]
-        result_df = filtered_df[columns_to_save]
-
-        st.success(f"✅ '{selected_person}' 데이터 {len(result_df)}건 필터링 완료")
-        st.dataframe(result_df, use_container_width=True)
-
-        def convert_df_to_excel(df):
-            buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False)
-            return buffer.getvalue()
-
-        excel_data = convert_df_to_excel(result_df)
-
-        st.download_button(
-            label="📥 결과 엑셀 다운로드",
-            data=excel_data,
-            file_name=f"{selected_person}_선정결과.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-
-        st.markdown("★★다른 담당자의 결과값을 받기 위해서는 담당자의 이름을 다시 선택하세요.★★")
+import streamlit as st
+import pandas as pd
+import re
+import zipfile
+from io import BytesIO
+
+import datasets
+import downloads
+import jobs
+import widgets
+
+INPUTS = ["AS현황"]
+
+COLUMNS_TO_SAVE = [
+    'AS접수번호', '제목', 'AS접수일자', '인보이스발행일자', 'AS구분', 'AS진행상태',
+    '입금상태', '청구상태', '투입자재계획', '외주계획', '기타계획', '출장계획',
+    '투입자재계획.1', '외주계획.1', '기타계획.1', '출장계획.1', '접수담당자', '점검사항'
+]
+
+# 일괄 다운로드 형식: 담당자별 엑셀을 묶은 zip / 담당자별 시트를 담은 엑셀 한 파일
+BULK_LAYOUTS = {"zip": "담당자별 엑셀 파일 (zip)", "sheets": "담당자별 시트 (엑셀 한 파일)"}
+# 접수담당자가 비어 있는 건은 이 이름으로 묶는다
+UNASSIGNED = "(담당자 없음)"
+# 엑셀 시트 이름(31자)과 zip 안 파일 이름에 쓸 수 없는 문자
+SHEET_INVALID = re.compile(r"[\[\]:*?/\\]")
+FILE_INVALID = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+def to_excel(df):
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False)
+    return buffer.getvalue()
+
+
+def workbook_job(progress, cancel, df):
+    # 작업 프로세스에서 담당자 한 명의 엑셀을 만든다
+    return to_excel(df)
+
+
+def sheets_job(progress, cancel, groups):
+    # 작업 프로세스에서 시트 이름 → 표 를 시트 하나씩 담은 엑셀로 만든다
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        for sheet_name, group in groups.items():
+            if cancel.is_set():
+                return None
+            group.to_excel(writer, index=False, sheet_name=sheet_name)
+    return buffer.getvalue()
+
+
+def safe_names(people, invalid, limit):
+    # 담당자 → 시트/파일 이름. 쓸 수 없는 문자는 _ 로 바꾸고 limit 자로 자른 뒤, 겹치면(대소문자 무시) 뒤에 (2), (3) ... 을 붙인다
+    names, used = {}, set()
+    for person in people:
+        base = invalid.sub("_", str(person)).strip().strip("'.") or "_"
+        name, n = base[:limit], 1
+        while name.lower() in used:
+            n += 1
+            suffix = f"({n})"
+            name = base[:limit - len(suffix)] + suffix
+        used.add(name.lower())
+        names[person] = name
+    return names
+
+
+def bulk_export(df, layout, fingerprint):
+    # 선정 결과를 접수담당자별로 한 번만 나눈다.
+    # zip 은 담당자별 엑셀을 작업 대기열에서 나란히 만들어 묶고, sheets 는 한 파일에 시트로 모은다
+    # 담당자가 비어 있는 건도 빠지지 않도록 UNASSIGNED 로 묶는다
+    frame = df[COLUMNS_TO_SAVE]
+    people = frame['접수담당자'].fillna(UNASSIGNED).rename('접수담당자')
+    groups = {person: group for person, group in frame.groupby(people, sort=False)}
+    if layout == "sheets":
+        sheet_names = safe_names(groups, SHEET_INVALID, 31)
+        sheets = {sheet_names[person]: group for person, group in groups.items()}
+        submitted = {None: jobs.submit(f"as_analysis-sheets-{fingerprint}", sheets_job, sheets)}
+    else:
+        submitted = {
+            person: jobs.submit(f"as_analysis-{fingerprint}-{person}", workbook_job, group)
+            for person, group in groups.items()
+        }
+    try:
+        workbooks = {person: job.future.result() for person, job in submitted.items()}
+    finally:
+        for job in submitted.values():
+            if not job.future.done():
+                jobs.release(job)
+    if layout == "sheets":
+        return workbooks[None]
+
+    # xlsx 는 이미 압축된 파일이므로 zip 에는 그대로 담는다
+    file_names = safe_names(workbooks, FILE_INVALID, 100)
+    output = BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as zf:
+        for person, data in workbooks.items():
+            zf.writestr(f"{file_names[person]}_선정결과.xlsx", data)
+    return output.getvalue()
+
+
+@st.fragment
+def show_results(df):
+    # ✅ 담당자 선택과 결과 표/다운로드만 다시 실행한다 (파일 읽기와 대상 선정은 다시 하지 않음)
+    # fragment 안에서는 사이드바에 쓸 수 없으므로 담당자 선택은 본문에 둔다
+    st.subheader("🧑‍💼 접수담당자 선택")
+    담당자_목록 = df['접수담당자'].dropna().unique().tolist()
+    selected_person = st.selectbox("접수담당자를 선택하세요", options=["전체"] + 담당자_목록)
+
+    filtered_df = df if selected_person == "전체" else df[df['접수담당자'] == selected_person]
+
+    result_df = filtered_df[COLUMNS_TO_SAVE]
+
+    st.success(f"✅ '{selected_person}' 데이터 {len(result_df)}건 필터링 완료")
+    widgets.paged_dataframe(result_df, key="as_analysis_result")
+
+    if not datasets.is_ready("AS현황"):
+        st.info("⏳ 전체 파일을 읽은 뒤에 결과 엑셀을 다운로드할 수 있습니다.")
+        return
+
+    # 엑셀은 다운로드를 누를 때 만든다
+    st.download_button(
+        label="📥 결과 엑셀 다운로드",
+        data=lambda: to_excel(result_df),
+        file_name=f"{selected_person}_선정결과.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    downloads.stream_buttons({"선정결과": result_df}, f"{selected_person}_선정결과", key="as_analysis")
+
+    # ✅ 담당자별 결과를 한 번에 받는다 (담당자를 하나씩 다시 고르지 않아도 됨)
+    st.subheader("📦 담당자별 일괄 다운로드")
+    layout = st.radio("형식", options=list(BULK_LAYOUTS), format_func=BULK_LAYOUTS.get, horizontal=True, key="as_analysis_bulk_layout")
+    fingerprint = datasets.fingerprint(*INPUTS)
+    st.download_button(
+        label=f"📥 담당자 {len(담당자_목록)}명 결과 일괄 다운로드",
+        data=lambda: bulk_export(df, layout, fingerprint),
+        file_name="담당자별_선정결과.zip" if layout == "zip" else "담당자별_선정결과.xlsx",
+        mime="application/zip" if layout == "zip" else "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        key="as_analysis_bulk"
+    )
+
+
+def app():  # ✅ 여기에 전체 코드를 넣는 것이 핵심!
+    st.set_page_config(page_title="AS 상태 업데이트 및 결산 마감 대상 선정", layout="wide")
+
+    st.markdown(
+        "<h1 style='display: inline;'>📂 AS 상태 업데이트 및 결산 마감 대상 선정</h1> "
+        "<br><span style='color: red; font-size: 30px;'>※ 업로드할 파일은 ERP의 "
+        "<span style='color: blue;'><u>'AS현황 및 최종완료'</u></span>에서 다운 받은 파일을 업로드하세요!</span>",
+        unsafe_allow_html=True
+    )
+
+    df = datasets.load("AS현황", "✅ 분석할 Excel 파일을 업로드하세요 (.xlsx)", preview=True)
+
+    if df is not None:
+        df.columns = ['_'.join([str(i).strip() for i in col if pd.notna(i)]) for col in df.columns]
+
+        rename_dict = {
+            'AS접수번호_AS접수번호': 'AS접수번호',
+            '제목_제목': '제목',
+            'AS접수일자_AS접수일자': 'AS접수일자',
+            '인보이스발행일자_인보이스발행일자': '인보이스발행일자',
+            '전자결재번호상태_전자결재번호상태': '전자결재번호상태',
+            'AS진행상태_AS진행상태': 'AS진행상태',
+            'AS구분_AS구분': 'AS구분',
+            '청구상태_청구상태': '청구상태',
+            '입금상태_입금상태': '입금상태',
+            '접수담당자_접수담당자': '접수담당자',
+            '접수정보_투입자재계획': '투입자재계획',
+            '접수정보_외주계획': '외주계획',
+            '접수정보_기타계획': '기타계획',
+            '접수정보_출장계획': '출장계획',
+            '조치내역_투입자재계획': '투입자재계획.1',
+            '조치내역_외주계획': '외주계획.1',
+            '조치내역_기타계획': '기타계획.1',
+            '조치내역_출장계획': '출장계획.1',
+        }
+        df = df.rename(columns=rename_dict)
+
+        required_columns = ['전자결재번호상태', 'AS진행상태', 'AS구분', '청구상태', '입금상태']
+        missing_cols = [col for col in required_columns if col not in df.columns]
+        if missing_cols:
+            st.error(f"❗ 필수 컬럼 누락: {missing_cols}")
+            st.stop()
+
+        df = df[df['전자결재번호상태'] == '종결']
+        df = df[df['AS진행상태'].isin(['접수', '조치중', '기술적종료'])]
+        df = df[
+            (
+                df['AS구분'].isin(['유상', '위탁AS', '단품판매']) & (df['청구상태'] == '청구완료')
+            ) | (
+                df['AS구분'] == '무상'
+            )
+        ]
+
+        def match_rule3(row):
+            def is_O(*cols): return all(row.get(col) == 'O' for col in cols)
+            def is_X(*cols): return all(row.get(col) == 'X' for col in cols)
+            return any([
+                is_O('투입자재계획', '투입자재계획.1') and is_X('외주계획', '기타계획', '출장계획', '외주계획.1'),
+                is_O('투입자재계획', '기타계획', '투입자재계획.1') and is_X('외주계획', '출장계획', '외주계획.1'),
+                is_O('외주계획', '외주계획.1') and is_X('투입자재계획', '기타계획', '출장계획', '투입자재계획.1'),
+                row.get('기타계획') == 'O' and is_X('투입자재계획', '외주계획', '출장계획', '투입자재계획.1', '외주계획.1'),
+                is_O('기타계획', '출장계획') and is_X('투입자재계획', '외주계획', '투입자재계획.1', '외주계획.1'),
+                is_O('투입자재계획', '출장계획', '투입자재계획.1') and is_X('외주계획', '기타계획', '외주계획.1'),
+                is_O('투입자재계획', '외주계획', '투입자재계획.1', '외주계획.1') and is_X('기타계획', '출장계획'),
+                is_O('투입자재계획', '외주계획', '기타계획', '출장계획', '투입자재계획.1') and row.get('기타계획') == 'X',
+                row.get('출장계획') == 'O' and is_X('투입자재계획', '외주계획', '기타계획', '투입자재계획.1', '외주계획.1'),
+                is_O('외주계획', '출장계획', '외주계획.1') and is_X('투입자재계획', '기타계획', '투입자재계획.1'),
+                is_O('외주계획', '기타계획', '외주계획.1') and is_X('투입자재계획', '출장계획', '투입자재계획.1'),
+                is_O('투입자재계획', '외주계획', '기타계획', '출장계획', '투입자재계획.1', '외주계획.1'),
+                is_X('투입자재계획', '외주계획', '기타계획', '출장계획', '투입자재계획.1', '외주계획.1'),
+            ])
+        df = df[df.apply(match_rule3, axis=1)]
+
+        def generate_checklist(row):
+            if row['AS구분'] == '무상':
+                return "원가 투입 완료 여부 점검 / AS상태 업데이트 점검"
+            elif row['AS구분'] in ['유상', '단품판매'] and row['입금상태'] == '입금완료':
+                return "원가 투입 완료 여부 점검 / AS상태 업데이트 점검 / 최종완료 처리 점검"
+            elif row['AS구분'] in ['유상', '단품판매'] and row['입금상태'] in ['미입금', '부분입금']:
+                return "원가 투입 완료 여부 점검 / AS상태 업데이트 점검 / 공사완료 처리 점검"
+            else:
+                return ""
+
+        df['점검사항'] = df.apply(generate_checklist, axis=1)
+
+        show_results(df)
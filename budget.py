@@ -0,0 +1,298 @@
+import os
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+# ✅ 세션별 메모리 예산
+# 단계(업로드 가공, 집계 등)마다 세션이 들고 있는 표의 크기를 재어 단계별 최대치를 남긴다.
+# 예산을 넘으면 이 세션은 절약 모드로 바뀌어 필요한 컬럼만 남기고, 보관 중인 표를 범주형으로 줄이거나 디스크로 내린다.
+MEMORY_BUDGET_MB = 512
+SPILL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "spill")
+
+# 고유값 비율이 이보다 낮은 문자열 컬럼만 범주형으로 바꾼다
+CATEGORY_RATIO = 0.5
+
+# ✅ 세션 결과 보관 (keep/get)
+# 세션마다 메모리에 두는 결과는 RESULT_CACHE_MB 까지, 넘으면 가장 오래 안 쓴 결과부터 디스크로 내린다.
+# RESULT_IDLE_SECONDS 동안 안 쓴 결과는 크기와 상관없이 디스크로, RESULT_DROP_SECONDS 가 지나면 다시 계산할 수 있는 결과는 디스크에서도 지운다.
+# 다른 세션이 실행될 때도 SWEEP_SECONDS 마다 함께 정리하므로 열어만 둔 브라우저 탭이 큰 표를 계속 잡고 있지 않는다.
+# 다시 쓸 때(get) 디스크에서 읽고, 지워졌으면 keep 에 넘긴 recompute 로 다시 계산한다.
+RESULT_CACHE_MB = 128
+RESULT_IDLE_SECONDS = 10 * 60
+RESULT_DROP_SECONDS = 60 * 60
+SWEEP_SECONDS = 30
+
+MB = 1024 * 1024
+
+_lock = threading.RLock()
+# 세션별 상태 (세션이 끝나면 자동으로 빠진다)
+_sessions = weakref.WeakValueDictionary()
+_swept = 0.0
+
+
+class Spilled:
+    # 디스크로 내린 표. 화면에서 쓸 때 get() 이 다시 읽는다. 참조가 없어지면 파일도 지운다
+    def __init__(self, df):
+        os.makedirs(SPILL_DIR, exist_ok=True)
+        self.path = os.path.join(SPILL_DIR, f"{uuid.uuid4().hex}.pkl")
+        pd.to_pickle(df, self.path)
+        weakref.finalize(self, _remove, self.path)
+
+    def load(self):
+        return pd.read_pickle(self.path)
+
+
+class _State(dict):
+    # 세션 상태 dict. 다른 세션에서 약한 참조로 찾아 정리할 수 있도록 dict 를 상속한다
+    pass
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def size(obj):
+    # 표(또는 표를 담은 dict/list)의 메모리 크기(바이트). 엑셀 등 bytes 는 길이, 디스크로 내린 표는 0
+    if isinstance(obj, bytes):
+        return len(obj)
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(index=True, deep=True)
+        return int(usage.sum()) if isinstance(obj, pd.DataFrame) else int(usage)
+    if isinstance(obj, dict):
+        return sum(size(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(size(value) for value in obj)
+    return 0
+
+
+def _state():
+    state = st.session_state.get("memory")
+    if not isinstance(state, _State):
+        # kept: 이름 → {"value", "stage", "used", "recompute"} (오래 안 쓴 순)
+        state = st.session_state["memory"] = _State(kept=OrderedDict(), peaks={}, actions=[], lean=False)
+        _sessions[uuid.uuid4().hex] = state
+    return state
+
+
+def _set(entry, value, measured):
+    # 보관 결과를 바꿀 때 크기도 함께 적어 둔다 (정리할 때마다 다시 재지 않게)
+    entry["value"] = value
+    entry["bytes"] = measured
+
+
+def _resident(state):
+    # 메모리에 올라와 있는 보관 결과 크기
+    with _lock:
+        return sum(entry["bytes"] for entry in state["kept"].values())
+
+
+def _held(entry):
+    # 업로드 데이터 크기. 공유 저장소에서 빌린 표(메모리 매핑)는 세션마다 따로 들고 있지 않으므로 세지 않는다
+    # 표가 바뀔 때 한 번만 재어 데이터셋 항목에 적어 둔다
+    df = entry.get("df")
+    if df is None or entry.get("lease") is not None:
+        return 0
+    measured = entry.get("bytes")
+    if measured is None or measured[0] is not df:
+        measured = entry["bytes"] = (df, size(df))
+    return measured[1]
+
+
+def usage():
+    # 세션이 들고 있는 업로드 데이터 + keep() 으로 보관한 표
+    held = sum(_held(entry) for entry in st.session_state.get("datasets", {}).values())
+    return held + _resident(_state())
+
+
+def lean():
+    # 이 세션이 한 번이라도 예산을 넘었으면 True
+    return _state()["lean"]
+
+
+def project(df, columns):
+    # 절약 모드에서는 필요한 컬럼만 남긴다 (결과는 같고 이후 단계의 복사본이 작아진다)
+    if not lean():
+        return df
+    return df[[col for col in columns if col in df.columns]]
+
+
+def categorize(df):
+    # 반복되는 문자열 컬럼을 범주형으로 바꾼 표와 바꾼 컬럼 목록
+    columns = [
+        col for col in df.columns
+        if (pd.api.types.is_string_dtype(df[col]) or df[col].dtype == object)
+        and not isinstance(df[col].dtype, pd.CategoricalDtype)
+        and df[col].nunique(dropna=True) < len(df) * CATEGORY_RATIO
+    ]
+    if not columns:
+        return df, []
+    return df.astype({col: "category" for col in columns}), columns
+
+
+def _note(state, stage, text):
+    state["actions"].append(f"[{stage}] {text}")
+
+
+def _act(stage, text):
+    _note(_state(), stage, text)
+    st.toast(f"🧠 메모리 절약: {text}")
+
+
+def _degrade(stage):
+    # 큰 표부터 범주형 변환 → 그래도 넘으면 디스크로 내린다
+    state = _state()
+    budget = MEMORY_BUDGET_MB * MB
+    with _lock:
+        kept = sorted(state["kept"].items(), key=lambda item: item[1]["bytes"], reverse=True)
+    for name, entry in kept:
+        df = entry["value"]
+        if not isinstance(df, pd.DataFrame):
+            continue
+        before = entry["bytes"]
+        df, columns = categorize(df)
+        if columns:
+            after = size(df)
+            with _lock:
+                _set(entry, df, after)
+            _act(stage, f"'{name}' 문자열 컬럼 {len(columns)}개를 범주형으로 변환 ({before / MB:,.1f}MB → {after / MB:,.1f}MB)")
+        if usage() <= budget:
+            return
+    for name, entry in kept:
+        df = entry["value"]
+        if not isinstance(df, pd.DataFrame):
+            continue
+        before = entry["bytes"]
+        spilled = Spilled(df)
+        with _lock:
+            if entry["value"] is df:
+                _set(entry, spilled, 0)
+        _act(stage, f"'{name}' ({before / MB:,.1f}MB)을 디스크로 내림")
+        if usage() <= budget:
+            return
+
+
+def _evict(state, now):
+    # 오래 안 쓴 결과부터: 다시 계산할 수 있고 아주 오래됐으면 지우고, 오래됐거나 보관 한도를 넘으면 디스크로 내린다
+    # 무엇을 내릴지만 잠금 안에서 정하고 디스크에 쓰는 일은 잠금 밖에서 한다 (다른 세션이 기다리지 않게)
+    spill = []
+    with _lock:
+        resident = _resident(state)
+        for name, entry in state["kept"].items():
+            idle = now - entry["used"]
+            if entry["recompute"] is not None and idle > RESULT_DROP_SECONDS and entry["value"] is not None:
+                resident -= entry["bytes"]
+                _set(entry, None, 0)
+                _note(state, entry["stage"], f"'{name}' 을 {idle / 60:,.0f}분 동안 쓰지 않아 비움 (다시 열면 새로 계산)")
+            elif isinstance(entry["value"], pd.DataFrame) and (idle > RESULT_IDLE_SECONDS or resident > RESULT_CACHE_MB * MB):
+                resident -= entry["bytes"]
+                reason = f"{idle / 60:,.0f}분 동안 쓰지 않아" if idle > RESULT_IDLE_SECONDS else f"보관 한도 {RESULT_CACHE_MB}MB 를 넘어"
+                spill.append((name, entry, entry["value"], reason))
+    for name, entry, df, reason in spill:
+        spilled = Spilled(df)
+        with _lock:
+            # 쓰는 사이에 다시 보관했거나 바뀐 결과는 그대로 둔다
+            if entry["value"] is not df:
+                continue
+            _set(entry, spilled, 0)
+            _note(state, entry["stage"], f"'{name}' 을 {reason} 디스크로 내림")
+
+
+def sweep():
+    # 모든 세션의 보관 결과를 정리한다 (어느 세션이 실행되든 함께 호출하지만 SWEEP_SECONDS 에 한 번만)
+    global _swept
+    now = time.time()
+    with _lock:
+        if now - _swept < SWEEP_SECONDS:
+            return
+        _swept = now
+    for state in list(_sessions.values()):
+        _evict(state, now)
+
+
+def track(stage, *objs):
+    # 단계가 끝날 때 호출. objs 는 이 단계가 잠시 들고 있는 중간 결과. 예산을 넘으면 절약 모드로 바꾸고 보관 중인 표를 줄인다
+    state = _state()
+    used = usage() + size(objs)
+    state["peaks"][stage] = max(state["peaks"].get(stage, 0), used)
+    if used > MEMORY_BUDGET_MB * MB:
+        if not state["lean"]:
+            state["lean"] = True
+            _act(stage, f"사용량 {used / MB:,.1f}MB 가 예산 {MEMORY_BUDGET_MB}MB 를 넘어 절약 모드로 전환 (필요한 컬럼만 사용)")
+        _degrade(stage)
+    return used
+
+
+def keep(stage, recompute=None, **frames):
+    # 다음 실행까지 세션에 보관할 표. 줄어들거나 디스크로 내려가거나 비워질 수 있으므로 꺼낼 때는 get() 을 쓴다
+    # recompute: 비워진 뒤 다시 쓸 때 호출할 함수. frames 와 같은 이름의 dict 를 돌려준다
+    state = _state()
+    now = time.time()
+    # 크기는 보관할 때 한 번만 잰다
+    measured = {name: size(df) for name, df in frames.items()}
+    with _lock:
+        for name, df in frames.items():
+            state["kept"][name] = {"value": df, "bytes": measured[name], "stage": stage, "used": now, "recompute": recompute}
+            state["kept"].move_to_end(name)
+    # 이 세션의 보관 한도는 바로 맞추고, 다른 세션 정리는 주기에 맞춰
+    _evict(state, now)
+    sweep()
+    return track(stage)
+
+
+def get(name):
+    state = _state()
+    with _lock:
+        entry = state["kept"].get(name)
+        if entry is None:
+            return None
+        entry["used"] = time.time()
+        state["kept"].move_to_end(name)
+        value = entry["value"]
+    if value is not None and not isinstance(value, Spilled):
+        return value
+    if isinstance(value, Spilled):
+        try:
+            value = value.load()
+        except Exception:
+            value = None
+    if value is None:
+        if entry["recompute"] is None:
+            return None
+        frames = entry["recompute"]()
+        keep(entry["stage"], entry["recompute"], **frames)
+        return frames.get(name)
+    # 디스크에서 다시 읽은 결과는 보관 한도와 세션 예산 안이면 메모리로 다시 올린다
+    measured = size(value)
+    if measured <= RESULT_CACHE_MB * MB and usage() + measured <= MEMORY_BUDGET_MB * MB:
+        with _lock:
+            if isinstance(entry["value"], Spilled):
+                _set(entry, value, measured)
+        _evict(state, time.time())
+    return value
+
+
+def report():
+    # 사이드바용: 현재 사용량, 단계별 최대치, 보관 결과, 절약 조치 내역
+    sweep()
+    state = _state()
+    st.caption(f"🧠 세션 메모리 {usage() / MB:,.1f}MB / 예산 {MEMORY_BUDGET_MB}MB" + (" · 절약 모드" if state["lean"] else ""))
+    with _lock:
+        kept = list(state["kept"].values())
+    if kept:
+        resident = sum(1 for entry in kept if isinstance(entry["value"], pd.DataFrame))
+        spilled = sum(1 for entry in kept if isinstance(entry["value"], Spilled))
+        st.caption(f"📦 보관 결과 {len(kept)}개 (메모리 {resident} · 디스크 {spilled} · 비움 {len(kept) - resident - spilled}) · 한도 {RESULT_CACHE_MB}MB")
+    if state["peaks"] or state["actions"]:
+        with st.expander("메모리 사용 내역"):
+            for stage, peak in state["peaks"].items():
+                st.markdown(f"- {stage}: 최대 {peak / MB:,.1f}MB")
+            for action in state["actions"]:
+                st.markdown(f"- {action}")
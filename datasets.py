@@ -0,0 +1,616 @@
+import glob
+import hashlib
+import logging
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import openpyxl
+import pandas as pd
+import streamlit as st
+from pandas.io.parsers import TextParser
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import jobs
+import store
+
+_log = logging.getLogger(__name__)
+
+# ✅ ERP에서 내려받는 엑셀 종류별 메뉴명, 읽기 옵션, 파일 판별용 대표 컬럼
+# 대표 컬럼은 기능이 반드시 읽는(없으면 오류가 나는) 컬럼만 둔다. 있으면 쓰는 컬럼까지 넣으면 정상 파일을 거절한다.
+# 한 번 파싱한 결과를 세션 레지스트리에 보관하고, 같은 파일을 쓰는 모든 기능이 공유한다.
+EXPORTS = {
+    "AS현황": {
+        "menu": "AS현황 및 최종완료",
+        "read": {"header": [0, 1]},
+        "columns": ["AS접수번호", "전자결재번호상태", "AS진행상태", "AS구분", "AS접수일자", "접수담당자"],
+    },
+    "AS프로젝트매출관리": {
+        "menu": "AS프로젝트매출관리",
+        "read": {},
+        "columns": ["AS구분", "제품군(1)", "담당자", "당월매출액", "당월매출원가", "당월손익"],
+    },
+    "대금청구현황": {
+        "menu": "대금청구현황",
+        "read": {},
+        "columns": ["INVOICE발행일자", "청구일자", "통화", "청구상태", "미입금잔액(통화)", "미입금잔액(원화)"],
+    },
+    "AS비용현황": {
+        "menu": "AS비용현황",
+        "read": {"skiprows": [1]},
+        "columns": ["AS접수번호", "AS구분", "진행상태", "입금상태", "청구상태", "입금액(원화)"],
+    },
+    "구매요청현황": {
+        "menu": "구매요청현황",
+        "read": {"dtype": str},
+        "columns": ["구매요청상태", "구매그룹", "요청일자", "발주일자", "납기일자", "최근입고일자"],
+    },
+    "프로젝트": {
+        "menu": "프로젝트현황",
+        "read": {},
+        "columns": ["프로젝트명", "프로젝트상태", "제품군(1)", "계약구분", "인도일자"],
+    },
+}
+
+# ✅ 업로드 직후 미리보기로 먼저 보여줄 행 수와 진행률 갱신 간격
+PREVIEW_ROWS = 3000
+PROGRESS_EVERY = 1000
+
+# 한 번 읽은 파일은 Parquet 스냅샷으로 남겨 두고, 같은 파일이 다시 올라오면 파싱을 건너뛴다
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "snapshots")
+# 스냅샷은 종류별로 최근에 쓴 SNAPSHOT_KEEP 개까지, 마지막으로 쓴 지 SNAPSHOT_MAX_AGE(초)가 지나면 지운다
+SNAPSHOT_KEEP = 10
+SNAPSHOT_MAX_AGE = 30 * 24 * 3600
+
+# ✅ 업로드 파일은 메모리 버퍼째 넘기지 않고 임시 파일로 옮겨 적은 뒤, 그 경로를 메모리 매핑해서 판별/파싱한다.
+# 파싱이 끝나(스냅샷 또는 공유 저장소에 올라가)면 임시 파일과 Streamlit 이 들고 있는 업로드 버퍼를 바로 놓아준다.
+SPOOL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "uploads")
+SPOOL_CHUNK = 1024 * 1024
+# 취소 등으로 남은 임시 파일은 이 시간(초)이 지나면 다음 업로드 때 지운다
+SPOOL_MAX_AGE = 6 * 3600
+
+# 세션별 파싱을 맡는 스레드. 실제 읽기는 jobs 작업 프로세스에서 하고 이 스레드는 진행률을 옮겨 적으며 기다린다
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="excel-parse")
+
+
+def registry():
+    return st.session_state.setdefault("datasets", {})
+
+
+def clear():
+    registry().clear()
+    _rejected().clear()
+
+
+def _rejected():
+    # 판별이나 읽기에 실패한 업로드 (file_id → 판별 결과). 다른 파일을 올릴 때까지 같은 파일을 다시 옮겨 적거나 읽지 않는다
+    return st.session_state.setdefault("rejected_uploads", {})
+
+
+def show_read_error(e):
+    st.error(
+        f"""
+        ❌ 엑셀 파일을 열 수 없습니다.
+        🔒 DRM(디지털 권한 관리)으로 보호된 파일일 수 있습니다.
+        👉 오류 내용: {e}
+        """
+    )
+    st.stop()
+
+
+def _dedupe(names):
+    # read_excel 과 같은 방식으로 중복 컬럼명 뒤에 .1, .2 ... 를 붙인다
+    seen = {}
+    result = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            result.append(f"{name}.{seen[name]}")
+        else:
+            seen[name] = 0
+            result.append(name)
+    return result
+
+
+def view(df, header=None):
+    # 두 줄 헤더(AS현황)는 MultiIndex 로 한 번만 읽고, 기능별로 필요한 헤더 줄만 골라 쓴다
+    #   header=None → MultiIndex 그대로 / header=0 → 첫 줄 기준 / header=1 → 둘째 줄 기준(skiprows=1 과 동일)
+    # 레지스트리 원본이 기능별 가공(컬럼명 변경 등)에 오염되지 않도록 항상 얕은 복사본을 넘긴다
+    if header is None or not isinstance(df.columns, pd.MultiIndex):
+        return df.copy(deep=False)
+    names = [str(col[header]) for col in df.columns]
+    return df.set_axis(_dedupe(names), axis=1)
+
+
+def _header_rows(read):
+    # 데이터가 시작되기 전까지의 행 수 (헤더 줄 + 건너뛰는 줄)
+    header = read.get("header", 0)
+    rows = max(header) + 1 if isinstance(header, list) else header + 1
+    return rows + len(read.get("skiprows") or [])
+
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+SNIFF_ROWS = 3
+
+
+class _Mapped(mmap.mmap):
+    # zipfile 이 요구하는 seekable() 을 붙인 읽기 전용 메모리 매핑 (Python 3.13 전에는 mmap 에 없음)
+    def seekable(self):
+        return True
+
+
+def _mapped(path):
+    with open(path, "rb") as f:
+        return _Mapped(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def file_sha(path):
+    # 파일을 통째로 읽지 않고 조각씩 sha256 을 계산한다
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(SPOOL_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _prune_spool():
+    for path in glob.glob(os.path.join(SPOOL_DIR, "*.xlsx")):
+        try:
+            if time.time() - os.path.getmtime(path) > SPOOL_MAX_AGE:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def spool(uploaded_file):
+    # 업로드 버퍼를 임시 파일로 조각씩 옮겨 적으며 sha256 도 함께 계산한다 (버퍼 전체를 한 번 더 복사하지 않는다)
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    _prune_spool()
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(suffix=".xlsx", dir=SPOOL_DIR)
+    with os.fdopen(fd, "wb") as f, uploaded_file.getbuffer() as buffer:
+        for start in range(0, len(buffer), SPOOL_CHUNK):
+            chunk = buffer[start:start + SPOOL_CHUNK]
+            digest.update(chunk)
+            f.write(chunk)
+    return path, digest.hexdigest()
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _first_sheet_path(zf):
+    workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+    rid = workbook.find(f"{_NS}sheets/{_NS}sheet").get(f"{_REL_NS}id")
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    target = next(rel.get("Target") for rel in rels if rel.get("Id") == rid)
+    return target.lstrip("/") if target.startswith("/") else "xl/" + target
+
+
+def _shared_strings(zf, needed):
+    # 헤더에 쓰인 번호까지만 공유 문자열 테이블을 읽고 멈춘다
+    if not needed or "xl/sharedStrings.xml" not in zf.namelist():
+        return {}
+    strings = {}
+    i = 0
+    with zf.open("xl/sharedStrings.xml") as f:
+        for _, el in ET.iterparse(f):
+            if el.tag != f"{_NS}si":
+                continue
+            if i in needed:
+                strings[i] = "".join(t.text or "" for t in el.iter(f"{_NS}t"))
+            el.clear()
+            if i >= max(needed):
+                break
+            i += 1
+    return strings
+
+
+def _sniff_sheet(path):
+    # 시트 XML 의 dimension 과 앞쪽 몇 줄만 읽어 헤더 후보와 마지막 행 번호를 얻는다
+    with _mapped(path) as mapped, zipfile.ZipFile(mapped) as zf:
+        last_row = None
+        rows = []
+        with zf.open(_first_sheet_path(zf)) as f:
+            for _, el in ET.iterparse(f):
+                if el.tag == f"{_NS}dimension":
+                    match = re.search(r"(\d+)$", el.get("ref", ""))
+                    last_row = int(match.group(1)) if match and ":" in el.get("ref", "") else None
+                elif el.tag == f"{_NS}row":
+                    cells = []
+                    for c in el.iter(f"{_NS}c"):
+                        if c.get("t") == "inlineStr":
+                            cells.append("".join(t.text or "" for t in c.iter(f"{_NS}t")))
+                        elif c.find(f"{_NS}v") is not None:
+                            v = c.find(f"{_NS}v").text
+                            cells.append(int(v) if c.get("t") == "s" else v)
+                    rows.append(cells)
+                    el.clear()
+                    if len(rows) >= SNIFF_ROWS:
+                        break
+        needed = {v for row in rows for v in row if isinstance(v, int)}
+        strings = _shared_strings(zf, needed)
+    rows = [[strings.get(v, "") if isinstance(v, int) else v for v in row] for row in rows]
+    return rows, last_row
+
+
+def sniff(path):
+    # 엑셀 전체를 읽지 않고 헤더만으로 어떤 ERP 파일인지 판별하고 데이터 행 수를 미리 알려준다
+    started = time.perf_counter()
+    try:
+        rows, last_row = _sniff_sheet(path)
+    except Exception as e:
+        return {"key": None, "rows": None, "error": e, "ms": (time.perf_counter() - started) * 1000}
+
+    names = {re.sub(r"[\r\n]", "", str(v)).strip() for row in rows for v in row}
+    matches = [key for key, spec in EXPORTS.items() if set(spec["columns"]) <= names]
+    key = max(matches, key=lambda k: len(EXPORTS[k]["columns"]), default=None)
+    data_rows = None
+    if key and last_row:
+        data_rows = max(last_row - _header_rows(EXPORTS[key]["read"]), 0)
+    return {"key": key, "rows": data_rows, "error": None, "ms": (time.perf_counter() - started) * 1000}
+
+
+def _convert_cell(value):
+    # pandas openpyxl 리더와 같은 셀 변환 (빈 셀 → "", 정수로 떨어지는 실수 → int)
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _fill_header(row, control_row):
+    # 병합된 상위 헤더(예: 접수정보, 조치내역)를 같은 그룹 안에서만 앞 값으로 채운다
+    last = row[0]
+    for i in range(1, len(row)):
+        if not control_row[i]:
+            last = row[i]
+        if row[i] == "":
+            row[i] = last
+        else:
+            control_row[i] = False
+            last = row[i]
+    return row, control_row
+
+
+def _to_frame(rows, read):
+    # 읽어 둔 행 목록을 read_excel 과 같은 파서(TextParser)로 DataFrame 으로 만든다
+    if not rows:
+        return pd.DataFrame()
+    width = max(len(row) for row in rows)
+    data = [row + [""] * (width - len(row)) for row in rows]
+    header = read.get("header", 0)
+    if isinstance(header, list):
+        control_row = [True] * width
+        for i in header:
+            data[i], control_row = _fill_header(list(data[i]), control_row)
+    return TextParser(
+        data,
+        header=header,
+        skiprows=read.get("skiprows"),
+        dtype=read.get("dtype"),
+        skip_blank_lines=False,
+    ).read()
+
+
+def _read_rows(entry, path, read):
+    # 진행률/미리보기를 entry 에 기록하면서 행을 읽는다. 취소되면 None
+    mapped = _mapped(path)
+    wb = openpyxl.load_workbook(mapped, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[0]
+        if entry["total"] is None:
+            entry["total"] = ws.max_row
+        ws.reset_dimensions()
+        skip = _header_rows(read)
+        rows = []
+        last_row_with_data = -1
+        for i, values in enumerate(ws.iter_rows(values_only=True)):
+            row = [_convert_cell(v) for v in values]
+            while row and row[-1] == "":
+                row.pop()
+            if row:
+                last_row_with_data = i
+            rows.append(row)
+            if i % PROGRESS_EVERY == 0:
+                if entry["cancel"].is_set():
+                    return None
+                entry["done"] = max(i + 1 - skip, 0)
+            if i == PREVIEW_ROWS:
+                entry["preview"] = _to_frame(rows, read)
+    finally:
+        wb.close()
+        mapped.close()
+    return _to_frame(rows[:last_row_with_data + 1], read)
+
+
+def snapshot_path(key, sha):
+    return os.path.join(SNAPSHOT_DIR, f"{key}-{sha}.parquet")
+
+
+def _prune_snapshots():
+    # 종류별로 최근에 쓴 순서로 SNAPSHOT_KEEP 개만 남기고, 오래 안 쓴 스냅샷은 지운다 (수정 시각 = 마지막으로 쓴 시각)
+    by_key = {}
+    for path in glob.glob(os.path.join(SNAPSHOT_DIR, "*.parquet")):
+        try:
+            by_key.setdefault(os.path.basename(path).rsplit("-", 1)[0], []).append((os.path.getmtime(path), path))
+        except OSError:
+            pass
+    for found in by_key.values():
+        found.sort(reverse=True)
+        for i, (mtime, path) in enumerate(found):
+            if i >= SNAPSHOT_KEEP or time.time() - mtime > SNAPSHOT_MAX_AGE:
+                _discard(path)
+
+
+def _save_snapshot(df, path):
+    # 형식이 섞인 컬럼 등으로 Parquet 저장이 안 되면 스냅샷 없이 진행한다 (이유는 서버 로그에 남긴다)
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        _log.warning("스냅샷을 저장하지 못해 스냅샷 없이 진행합니다 (%s): %r", os.path.basename(path), e)
+        _discard(tmp_path)
+    _prune_snapshots()
+
+
+def _read_cached(entry, key, path):
+    # 같은 파일의 Parquet 스냅샷이 있으면 그대로 쓰고, 없으면 작업 대기열에서 읽는다(스냅샷도 남긴다). 취소되면 None
+    snapshot = snapshot_path(key, entry["sha"])
+    if os.path.exists(snapshot):
+        try:
+            # 다시 쓴 스냅샷은 정리 순서에서 뒤로 미룬다
+            os.utime(snapshot)
+            return pd.read_parquet(snapshot)
+        except OSError:
+            # 그 사이 정리된 스냅샷이면 다시 읽는다
+            pass
+    # 같은 파일을 다른 세션이 읽고 있으면 그 작업을 함께 기다린다. 작업 프로세스에는 파일 내용 대신 경로만 넘긴다
+    entry["job"] = jobs.submit(f"{key}-{entry['sha']}", _parse_job, key, path, entry["sha"])
+    return _wait(entry, entry["job"])
+
+
+def read(key, path, sha=None):
+    # 화면 없이(예약 집계 등) 파일 하나를 읽는다
+    entry = {"sha": sha or file_sha(path), "done": 0, "total": None, "preview": None, "cancel": threading.Event()}
+    return _read_cached(entry, key, path)
+
+
+class _RemoteEntry(dict):
+    # 작업 프로세스에서 읽을 때 진행률/미리보기 기록을 세션 쪽 entry 로 전달한다
+    def __init__(self, progress, cancel):
+        super().__init__(done=0, total=None, preview=None, cancel=cancel)
+        self.progress = progress
+
+    def __setitem__(self, name, value):
+        super().__setitem__(name, value)
+        self.progress[name] = value
+
+
+def _parse_job(progress, cancel, key, path, sha):
+    # 작업 프로세스에서 실행: 결과는 Parquet 스냅샷 경로로 넘기고, 저장할 수 없는 데이터면 DataFrame 을 그대로 돌려준다
+    df = _read_rows(_RemoteEntry(progress, cancel), path, EXPORTS[key]["read"])
+    if df is None:
+        return None
+    snapshot = snapshot_path(key, sha)
+    _save_snapshot(df, snapshot)
+    return snapshot if os.path.exists(snapshot) else df
+
+
+def _wait(entry, job):
+    # 작업이 끝날 때까지 진행률과 미리보기를 entry 로 옮겨 적는다. 취소하면 None
+    while not job.future.done():
+        if entry["cancel"].is_set():
+            jobs.release(job)
+            return None
+        entry["done"] = job.progress.get("done", 0)
+        if entry["total"] is None:
+            entry["total"] = job.progress.get("total")
+        if entry["preview"] is None:
+            entry["preview"] = job.progress.get("preview")
+        time.sleep(0.2)
+    result = job.future.result()
+    return pd.read_parquet(result) if isinstance(result, str) else result
+
+
+def _share(entry, name, df):
+    # 세션별 사본 대신 공유 저장소에 올린 읽기 전용 매핑을 쓴다. Arrow 로 못 바꾸는 데이터면 세션 사본 그대로
+    try:
+        entry["lease"] = store.publish(name, df)
+    except Exception:
+        return df
+    return entry["lease"].df
+
+
+def _release_upload(upload):
+    # Streamlit 이 세션에 들고 있는 업로드 버퍼를 놓아준다. 이후 업로드 창 값은 None 이 되고 등록된 데이터를 계속 쓴다
+    session_id, manager, file_id = upload
+    try:
+        manager.remove_file(session_id, file_id)
+    except Exception:
+        pass
+
+
+def _parse(entry, key, path, upload):
+    # 백그라운드 스레드에서 실행: 같은 파일을 이미 읽은 적이 있으면 Parquet 스냅샷을 바로 쓴다
+    try:
+        name = f"{key}-{entry['sha']}"
+        # 다른 세션이 이미 읽어 둔 파일이면 공유 저장소의 매핑을 그대로 쓴다
+        entry["lease"] = store.acquire(name)
+        if entry["lease"] is not None:
+            df = entry["lease"].df
+        else:
+            df = _read_cached(entry, key, path)
+            if df is None:
+                # 같은 파일을 기다리는 다른 세션의 작업이 이 임시 파일을 읽을 수 있으므로 남겨 둔다 (_prune_spool 이 정리)
+                entry["status"] = "cancelled"
+                return
+            df = _share(entry, name, df)
+        entry["df"] = df
+        entry["done"] = entry["total"] = len(df)
+        entry["status"] = "done"
+        if upload is not None:
+            _release_upload(upload)
+    except Exception as e:
+        entry["error"] = e
+        entry["status"] = "error"
+    _discard(path)
+
+
+def _start(key, uploaded_file, path, sha, total=None):
+    ctx = get_script_run_ctx()
+    upload = (ctx.session_id, ctx.uploaded_file_mgr, uploaded_file.file_id) if ctx is not None else None
+    entry = {
+        "name": uploaded_file.name,
+        "file_id": uploaded_file.file_id,
+        "sha": sha,
+        "status": "parsing",
+        "done": 0,
+        "total": total,
+        "preview": None,
+        "df": None,
+        "error": None,
+        "cancel": threading.Event(),
+        "job": None,
+        "lease": None,
+    }
+    _executor.submit(_parse, entry, key, path, upload)
+    return entry
+
+
+def route(uploaded_file, target=None):
+    # 어느 업로드 창에서 올렸든 헤더로 파일 종류를 판별해 맞는 데이터셋으로 등록한다
+    # target: 이 업로드 창이 받는 데이터셋. 다른 종류로 판별됐는데 그 데이터셋에 이미 다른 파일이 등록돼 있으면
+    # 바꾸지 않고 kept=True 로 알려준다 (바꾸려면 판별된 데이터셋을 target 으로 다시 부른다).
+    # target=None(자동 분류 업로드)이면 판별된 데이터셋을 바로 바꾼다
+    reg = registry()
+    for key, entry in reg.items():
+        if entry["file_id"] == uploaded_file.file_id:
+            return {"key": key, "rows": entry["total"], "error": None, "ms": 0.0}
+    rejected = _rejected()
+    sniffed = rejected.get(uploaded_file.file_id)
+    if sniffed is not None and not (sniffed.get("kept") and (sniffed["key"] == target or sniffed["key"] not in reg)):
+        return sniffed
+    rejected.pop(uploaded_file.file_id, None)
+
+    path, sha = spool(uploaded_file)
+    sniffed = sniff(path)
+    key = sniffed["key"]
+    if key is None:
+        _discard(path)
+        rejected[uploaded_file.file_id] = sniffed
+    elif key in reg and target is not None and key != target:
+        _discard(path)
+        sniffed = rejected[uploaded_file.file_id] = {**sniffed, "kept": True}
+    else:
+        if key in reg:
+            reg[key]["cancel"].set()
+        reg[key] = _start(key, uploaded_file, path, sha, sniffed["rows"])
+    return sniffed
+
+
+def fingerprint(*keys):
+    # 기능이 쓰는 데이터셋들의 내용 기준 식별값 (같은 파일이면 세션이 달라도 같다)
+    return "-".join(registry()[key]["sha"][:16] for key in keys)
+
+
+def is_ready(key):
+    entry = registry().get(key)
+    return entry is not None and entry["status"] == "done"
+
+
+@st.fragment(run_every=0.5)
+def _progress(key):
+    entry = registry().get(key)
+    # 미리보기가 처음 생기거나 파싱이 끝나면 화면 전체를 다시 그린다
+    if entry is None or entry["status"] != "parsing":
+        st.rerun()
+    if entry["preview"] is not None and not entry.get("preview_shown"):
+        entry["preview_shown"] = True
+        st.rerun()
+
+    job = entry.get("job")
+    position = job.position() if job is not None else 0
+    total = entry["total"]
+    if position > 0:
+        st.progress(0.0, text=f"⏳ '{entry['name']}' 읽기 대기 중... (대기 {position}번째)")
+    elif total:
+        st.progress(min(entry["done"] / total, 1.0), text=f"⏳ '{entry['name']}' 읽는 중... {entry['done']:,} / {total:,}행")
+    else:
+        st.progress(0.0, text=f"⏳ '{entry['name']}' 읽는 중... {entry['done']:,}행")
+    if st.button("⏹️ 읽기 취소", key=f"cancel_{key}"):
+        entry["cancel"].set()
+
+
+def load(key, label, header=None, preview=False):
+    # preview=True 이면 전체 파싱이 끝나기 전에도 앞부분 미리보기 데이터를 돌려준다 (is_ready 로 완료 여부 확인)
+    reg = registry()
+    entry = reg.get(key)
+
+    uploaded_file = st.file_uploader(label, type=["xlsx"], key=f"upload_{key}")
+
+    if uploaded_file is not None and (entry is None or entry["file_id"] != uploaded_file.file_id):
+        sniffed = route(uploaded_file, target=key)
+        if sniffed["error"] is not None:
+            show_read_error(sniffed["error"])
+        if sniffed["key"] is None:
+            st.error(f"❗ ERP '{EXPORTS[key]['menu']}' 파일이 아닙니다. 필요한 컬럼을 찾을 수 없습니다.")
+            return None
+        if sniffed.get("kept"):
+            # 다른 데이터셋에 이미 올린 파일은 묻지 않고 바꾸지 않는다
+            other = sniffed["key"]
+            st.warning(
+                f"❗ 업로드한 파일은 ERP '{EXPORTS[other]['menu']}' 파일입니다. "
+                f"'{EXPORTS[key]['menu']}' 파일을 업로드하세요. "
+                f"(이미 등록된 '{reg[other]['name']}' 파일의 '{other}' 데이터는 그대로 둡니다)"
+            )
+            if st.button(f"🔁 올린 파일로 '{other}' 데이터 바꾸기", key=f"replace_{key}"):
+                route(uploaded_file, target=other)
+                st.rerun()
+            return None
+        if sniffed["key"] != key:
+            st.warning(
+                f"❗ 업로드한 파일은 ERP '{EXPORTS[sniffed['key']]['menu']}' 파일입니다. "
+                f"'{EXPORTS[key]['menu']}' 파일을 업로드하세요. "
+                f"(올린 파일은 '{sniffed['key']}' 데이터로 등록되어 해당 기능에서 바로 사용할 수 있습니다)"
+            )
+            return None
+        entry = reg[key]
+
+    if entry is None:
+        return None
+
+    if entry["status"] == "error":
+        # 업로드 창에 같은 파일이 남아 있어도 다시 읽지 않도록 실패한 파일로 기록해 둔다
+        _rejected()[entry["file_id"]] = {"key": key, "rows": None, "error": entry["error"], "ms": 0.0}
+        del reg[key]
+        show_read_error(entry["error"])
+
+    if entry["status"] == "cancelled":
+        st.warning(f"⏹️ '{entry['name']}' 파일 읽기를 취소했습니다. 다시 분석하려면 파일을 새로 업로드하세요.")
+        return None
+
+    if entry["status"] == "parsing":
+        _progress(key)
+        if preview and entry["preview"] is not None:
+            st.caption(f"👀 전체 파일을 읽는 동안 앞부분 {len(entry['preview']):,}건으로 미리 보여줍니다.")
+            return view(entry["preview"], header)
+        return None
+
+    if uploaded_file is None:
+        st.info(f"📎 이미 업로드된 '{entry['name']}' 파일({len(entry['df']):,}건)을 사용합니다.")
+    return view(entry["df"], header)
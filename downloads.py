@@ -0,0 +1,92 @@
+import io
+import tempfile
+import zipfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+# ✅ 엑셀 외에 다른 도구로 바로 불러갈 수 있는 CSV / Parquet 다운로드
+# 결과 표를 CHUNK_ROWS 행씩 임시 파일에 이어 쓰므로 만드는 동안 표 전체의 사본(문자열 등)을 메모리에 두지 않는다.
+# Streamlit 다운로드 버튼은 bytes / BytesIO / 파일 경로로 연 파일만 받으므로 완성된 파일을 bytes 로 한 번 읽어 넘긴다.
+CHUNK_ROWS = 50_000
+
+
+def _flat(frame):
+    # 피벗처럼 인덱스에 의미가 있는 표는 인덱스를 컬럼으로 꺼내고, 컬럼명은 문자열로 맞춘다
+    if not isinstance(frame.index, pd.RangeIndex):
+        frame = frame.reset_index()
+    return frame.set_axis([str(c) for c in frame.columns], axis=1)
+
+
+def _write_csv(stream, frame):
+    # UTF-8-BOM 으로 써야 엑셀에서 열어도 한글이 깨지지 않는다
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    for start in range(0, max(len(frame), 1), CHUNK_ROWS):
+        frame.iloc[start:start + CHUNK_ROWS].to_csv(text, index=False, header=start == 0)
+    text.flush()
+    text.detach()
+
+
+def _arrow_schema(frame):
+    # 숫자/문자가 섞여 Arrow 로 바꿀 수 없는 컬럼은 문자열로 내보낸다
+    for col in frame.columns[frame.dtypes == object]:
+        try:
+            pa.array(frame[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            frame = frame.assign(**{col: frame[col].map(lambda x: x if pd.isna(x) else str(x))})
+    return frame, pa.Schema.from_pandas(frame, preserve_index=False)
+
+
+def _write_parquet(stream, frame):
+    frame, schema = _arrow_schema(frame)
+    with pq.ParquetWriter(stream, schema) as writer:
+        for start in range(0, max(len(frame), 1), CHUNK_ROWS):
+            chunk = frame.iloc[start:start + CHUNK_ROWS]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def csv_file(sheets):
+    # 표가 하나면 CSV 한 개, 여러 개면 시트별 CSV 를 zip 으로 묶는다
+    with tempfile.TemporaryFile() as output:
+        if len(sheets) == 1:
+            _write_csv(output, _flat(next(iter(sheets.values()))))
+        else:
+            with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zf:
+                for name, frame in sheets.items():
+                    with zf.open(f"{name}.csv", "w") as stream:
+                        _write_csv(stream, _flat(frame))
+        output.seek(0)
+        return output.read()
+
+
+def parquet_zip(sheets):
+    with tempfile.TemporaryFile() as output:
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as zf:
+            for name, frame in sheets.items():
+                with zf.open(f"{name}.parquet", "w") as stream:
+                    _write_parquet(stream, _flat(frame))
+        output.seek(0)
+        return output.read()
+
+
+def stream_buttons(sheets, file_stem, key):
+    # 엑셀 다운로드 버튼 옆에 두는 CSV / Parquet 버튼. 파일은 버튼을 눌렀을 때만 만든다
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="📄 CSV 다운로드 (UTF-8)",
+            data=lambda: csv_file(sheets),
+            file_name=f"{file_stem}.csv" if len(sheets) == 1 else f"{file_stem}_csv.zip",
+            mime="text/csv" if len(sheets) == 1 else "application/zip",
+            key=f"{key}_csv",
+        )
+    with col2:
+        st.download_button(
+            label="🗜️ Parquet 다운로드 (zip)",
+            data=lambda: parquet_zip(sheets),
+            file_name=f"{file_stem}_parquet.zip",
+            mime="application/zip",
+            key=f"{key}_parquet",
+        )
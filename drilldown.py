@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import datasets
+
+# ✅ AS접수번호 기준 드릴다운
+# 데이터셋마다 AS접수번호 → 행 위치 색인을, 요약표마다 칸(담당자×년월, 구분×유형 등) → AS접수번호 색인을
+# 버전별로 한 번만 만들어 두고, 표의 한 줄을 고르면 다시 훑지 않고 색인으로 원본 행을 바로 꺼낸다.
+KEY = "AS접수번호"
+
+# AS접수번호 로 이어지는 업로드 데이터셋과 읽을 헤더 줄
+LINKED = {"AS현황": 0, "AS비용현황": None, "대금청구현황": None}
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _key_index(version, name, _frame):
+    # AS접수번호(문자열) → 행 위치 배열
+    return _frame.groupby(_frame[KEY].astype(str), sort=False).indices
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _cell_index(version, name, by, _frame):
+    # 요약표 칸(by 값 조합) → 그 칸에 집계된 AS접수번호 배열
+    keys = _frame[KEY].astype(str).to_numpy()
+    index = _frame.groupby(list(by), sort=False).indices
+    return {(cell if isinstance(cell, tuple) else (cell,)): keys[positions] for cell, positions in index.items()}
+
+
+def cell(version, name, frame, by, values):
+    # 요약표 한 칸의 AS접수번호 (중복 제거). version 은 frame 의 데이터셋 버전(fingerprint 등)
+    found = _cell_index(version, name, tuple(by), frame).get(tuple(values))
+    return pd.unique(found) if found is not None else np.array([], dtype=object)
+
+
+def linked(exclude=()):
+    # 이 세션에 올라와 있는 AS접수번호 연결 데이터셋 {이름: (버전, 표)}
+    registry = datasets.registry()
+    sources = {}
+    for key, header in LINKED.items():
+        entry = registry.get(key)
+        if key not in exclude and entry is not None and entry["df"] is not None:
+            sources[key] = (entry["sha"], datasets.view(entry["df"], header))
+    return sources
+
+
+def rows(numbers, sources):
+    # sources: {이름: (버전, 표)} → {이름: numbers 에 해당하는 행}. 행이 없는 데이터셋은 빠진다
+    found = {}
+    for name, (version, frame) in sources.items():
+        index = _key_index(version, name, frame)
+        positions = [index[number] for number in numbers if number in index]
+        if positions:
+            found[name] = frame.iloc[np.sort(np.concatenate(positions))]
+    return found
+
+
+def show(title, numbers, sources):
+    st.markdown(f"#### 🔎 {title} · AS접수번호 {len(numbers):,}건")
+    found = rows(numbers, sources)
+    if not found:
+        st.info("연결된 원본 행이 없습니다.")
+        return
+    for name, frame in found.items():
+        st.caption(f"{name} ({len(frame):,}행)")
+        st.dataframe(frame, use_container_width=True)
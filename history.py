@@ -0,0 +1,136 @@
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# ✅ AS처리율 월별 이력 저장소
+# 업로드(또는 inbox)된 AS현황 파일마다 월별 접수/조치완료 건수를 계산해 월 단위 Parquet 파일로 쌓는다.
+# 새 파일이 들어오면 그 파일에 들어 있는 달 중 건수가 바뀐 달의 파일만 다시 쓰고, 나머지 달은 그대로 둔다.
+# 달마다 그 달을 마지막으로 쓴 파일의 기준일(파일에 나오는 가장 늦은 날짜)을 남겨 두고, 기준일이 그보다 이른 파일은
+# 그 달을 바꾸지 않는다. 그래서 예전 파일이나 일부 기간만 뽑은 파일을 나중에 올려도 최신 이력을 덮어쓰지 않는다.
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "history", "처리율")
+KEYS = ["AS구분", "제품군"]
+COUNTS = ["AS접수건수", "조치완료건수"]
+
+_lock = threading.Lock()
+_sources = None
+_months = None
+_cache = {"version": None, "data": None}
+
+
+def _sources_path():
+    return os.path.join(HISTORY_DIR, "sources.json")
+
+
+def _load_sources():
+    global _sources
+    if _sources is None:
+        try:
+            with open(_sources_path(), encoding="utf-8") as f:
+                _sources = json.load(f)
+        except FileNotFoundError:
+            _sources = {}
+    return _sources
+
+
+def _months_path():
+    return os.path.join(HISTORY_DIR, "months.json")
+
+
+def _load_months():
+    # 달("YYYY-MM") → 그 달 건수를 쓴 파일의 기준일("YYYY-MM-DD")
+    global _months
+    if _months is None:
+        try:
+            with open(_months_path(), encoding="utf-8") as f:
+                _months = json.load(f)
+        except FileNotFoundError:
+            _months = {}
+    return _months
+
+
+def _write_json(path, data):
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def _month_path(month):
+    return os.path.join(HISTORY_DIR, f"{month:%Y-%m}.parquet")
+
+
+def has(sha):
+    with _lock:
+        return sha in _load_sources()
+
+
+def update(sha, counts, as_of):
+    # counts: 접수년월_dt(월 첫날) + AS구분 + 제품군 별 AS접수건수/조치완료건수, as_of: 파일 기준일
+    # 파일에 들어 있는 달 중 기준일이 그 달의 기준일보다 이르지 않은 달만 이 파일 기준으로 바꾼다
+    as_of = f"{pd.Timestamp(as_of):%Y-%m-%d}"
+    with _lock:
+        sources = _load_sources()
+        if sha in sources:
+            return []
+        months = _load_months()
+        os.makedirs(HISTORY_DIR, exist_ok=True)
+        changed, stale = [], []
+        for month, rows in counts.groupby("접수년월_dt"):
+            name = f"{month:%Y-%m}"
+            if months.get(name, "") > as_of:
+                stale.append(name)
+                continue
+            months[name] = as_of
+            rows = rows[KEYS + COUNTS].sort_values(KEYS).reset_index(drop=True)
+            path = _month_path(month)
+            if os.path.exists(path) and pd.read_parquet(path).equals(rows):
+                continue
+            rows.to_parquet(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+            changed.append(name)
+        sources[sha] = {"at": time.time(), "as_of": as_of, "months": counts["접수년월_dt"].nunique(), "changed": changed, "stale": stale}
+        _write_json(_months_path(), months)
+        _write_json(_sources_path(), sources)
+        return changed
+
+
+def load():
+    # 쌓인 이력 전체 (접수년월 + AS구분 + 제품군 별 건수). 파일이 바뀌었을 때만 다시 읽는다
+    paths = sorted(glob.glob(os.path.join(HISTORY_DIR, "*.parquet")))
+    version = [(p, os.path.getmtime(p)) for p in paths]
+    with _lock:
+        if _cache["version"] != version:
+            frames = [pd.read_parquet(p).assign(접수년월=pd.Timestamp(os.path.basename(p)[:7])) for p in paths]
+            data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["접수년월"] + KEYS + COUNTS)
+            _cache.update(version=version, data=data)
+        return _cache["data"]
+
+
+def sources():
+    with _lock:
+        return dict(_load_sources())
+
+
+def rolling(data, window=12):
+    # 월별 건수 → 처리율, window 개월 이동 처리율, 전년 동월 대비. 누적합의 차로 계산하므로 달마다 상수 시간
+    monthly = data.groupby("접수년월")[COUNTS].sum()
+    if monthly.empty:
+        return monthly
+    months = pd.date_range(monthly.index.min(), monthly.index.max(), freq="MS", name="접수년월")
+    monthly = monthly.reindex(months, fill_value=0)
+
+    cum = monthly.cumsum()
+    rolled = (cum - cum.shift(window, fill_value=0)).astype("float64")
+    # 이력이 window 개월보다 짧은 앞쪽 달은 이동 처리율을 비워 둔다
+    rolled.iloc[:window - 1] = np.nan
+
+    result = monthly.copy()
+    result["AS처리율"] = (monthly["조치완료건수"] / monthly["AS접수건수"].replace(0, np.nan) * 100).round(2)
+    result[f"{window}개월 이동 처리율"] = (rolled["조치완료건수"] / rolled["AS접수건수"].replace(0, np.nan) * 100).round(2)
+    result["전년 동월 처리율"] = result["AS처리율"].shift(12)
+    result["전년 대비(%p)"] = (result["AS처리율"] - result["전년 동월 처리율"]).round(2)
+    return result
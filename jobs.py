@@ -0,0 +1,181 @@
+import importlib
+import itertools
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import streamlit as st
+import streamlit.logger
+
+import budget
+
+# ✅ 서버 전체가 함께 쓰는 무거운 작업(엑셀 읽기, 분류/집계, 엑셀 생성) 대기열
+# 세션 스레드에서 직접 돌리면 GIL 과 메모리를 두고 서로 경쟁하므로 정해진 수의 작업 프로세스에서 차례로 실행한다.
+# 같은 이름(작업 종류 + 파일 sha)의 작업이 이미 대기/실행 중이면 새로 돌리지 않고 함께 기다린다.
+MAX_WORKERS = 2
+
+# ✅ 끝난 build/prepare 결과 (작업 이름 → 결과). 같은 파일로 다시 실행하면(드릴다운 클릭 등) 작업 프로세스로 보내지 않고 바로 돌려준다
+# 결과표 + 엑셀 크기 합이 BUILD_CACHE_MB 를 넘으면 가장 오래 안 쓴 결과부터 버린다
+BUILD_CACHE_MB = 256
+
+_lock = threading.Lock()
+_jobs = {}
+_built = OrderedDict()
+_seq = itertools.count()
+_pool = None
+_manager = None
+
+
+class Job:
+    def __init__(self, name, progress, cancel):
+        self.name = name
+        self.seq = next(_seq)
+        self.progress = progress
+        self.cancel = cancel
+        self.waiters = 1
+        self.future = None
+
+    def started(self):
+        return self.future.done() or bool(self.progress.get("started"))
+
+    def position(self):
+        # 대기 중이면 몇 번째 차례인지(1부터), 실행 중이거나 끝났으면 0
+        if self.started():
+            return 0
+        with _lock:
+            waiting = [job for job in _jobs.values() if job.seq < self.seq and not job.started()]
+        return len(waiting) + 1
+
+
+def _init_worker():
+    # 작업 프로세스에는 화면(ScriptRunContext)이 없으므로 st.cache_data 등의 bare mode 경고를 끈다
+    streamlit.logger.set_log_level("error")
+
+
+def _run(fn, progress, cancel, args):
+    # 작업 프로세스에서 실행
+    progress["started"] = True
+    return fn(progress, cancel, *args)
+
+
+def _start_pool():
+    global _pool, _manager
+    context = multiprocessing.get_context("spawn")
+    if _manager is None:
+        _manager = context.Manager()
+    _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=context, initializer=_init_worker)
+
+
+def _finished(job):
+    with _lock:
+        if _jobs.get(job.name) is job:
+            del _jobs[job.name]
+
+
+def submit(name, fn, *args):
+    # fn(progress, cancel, *args) 는 모듈 최상위 함수여야 한다 (작업 프로세스로 넘기기 위해)
+    with _lock:
+        job = _jobs.get(name)
+        if job is not None:
+            job.waiters += 1
+            return job
+        if _pool is None:
+            _start_pool()
+        job = Job(name, _manager.dict(), _manager.Event())
+        try:
+            job.future = _pool.submit(_run, fn, job.progress, job.cancel, args)
+        except BrokenProcessPool:
+            # 작업 프로세스가 비정상 종료된 뒤라면 새 풀로 다시 시작
+            _start_pool()
+            job.future = _pool.submit(_run, fn, job.progress, job.cancel, args)
+        _jobs[name] = job
+    job.future.add_done_callback(lambda _: _finished(job))
+    return job
+
+
+def release(job):
+    # 기다리던 세션이 취소하거나 화면을 떠남. 기다리는 세션이 하나도 없으면 작업을 취소한다
+    with _lock:
+        job.waiters -= 1
+        if job.waiters > 0 or job.future.done():
+            return
+        if _jobs.get(job.name) is job:
+            del _jobs[job.name]
+    if not job.future.cancel():
+        job.cancel.set()
+
+
+def stats():
+    with _lock:
+        jobs = list(_jobs.values())
+    running = sum(1 for job in jobs if job.started())
+    return {"running": running, "queued": len(jobs) - running}
+
+
+def build_job(progress, cancel, module_name, *frames):
+    module = importlib.import_module(module_name)
+    results = module.build(*frames)
+    return results, module.to_excel(results)
+
+
+def prepare_job(progress, cancel, module_name, *frames):
+    return importlib.import_module(module_name).prepare(*frames)
+
+
+def _cached(name):
+    with _lock:
+        entry = _built.get(name)
+        if entry is None:
+            return None
+        _built.move_to_end(name)
+        return entry[0]
+
+
+def _remember(name, value):
+    # 크기는 넣을 때 한 번만 잰다
+    entry = (value, budget.size(value))
+    with _lock:
+        _built[name] = entry
+        _built.move_to_end(name)
+        total = sum(size for _, size in _built.values())
+        while total > BUILD_CACHE_MB * budget.MB and len(_built) > 1:
+            _, (_, size) = _built.popitem(last=False)
+            total -= size
+
+
+def _run_cached(name, message, fn, *args):
+    # fn 을 대기열에서 실행하고, 기다리는 동안 대기 순서를 보여준다
+    # 같은 이름(기능 + 데이터셋 버전)으로 이미 만든 결과가 있으면 대기열에 넣지 않는다
+    cached = _cached(name)
+    if cached is not None:
+        return cached
+    job = submit(name, fn, *args)
+    placeholder = st.empty()
+    try:
+        while not job.future.done():
+            position = job.position()
+            if position > 0:
+                placeholder.info(f"⏳ 다른 사용자의 작업이 끝나기를 기다리는 중입니다. (대기 {position}번째)")
+            else:
+                placeholder.info(message)
+            time.sleep(0.3)
+    finally:
+        if not job.future.done():
+            release(job)
+    placeholder.empty()
+    result = job.future.result()
+    _remember(name, result)
+    return result
+
+
+def build(module_name, fingerprint, *frames):
+    # 기능의 build() + to_excel() 결과 (결과표, 엑셀)
+    return _run_cached(f"{module_name}-{fingerprint}", "⚙️ 분류/집계 및 엑셀 생성 중입니다...", build_job, module_name, *frames)
+
+
+def prepare(module_name, fingerprint, *frames):
+    # 기능의 prepare() 결과 (보고서를 화면에서 나눠 계산하는 기능이 쓰는 정리된 원본)
+    return _run_cached(f"{module_name}-prepare-{fingerprint}", "⚙️ 원본 데이터 정리 중입니다...", prepare_job, module_name, *frames)
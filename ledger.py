@@ -0,0 +1,119 @@
+import glob
+import json
+import os
+import threading
+from datetime import date
+
+import pandas as pd
+
+# ✅ 채권 스냅샷 이력 (일별, 건별 변경분만 저장)
+# 업로드할 때마다 전체 표를 남기지 않고, 직전 스냅샷과 비교해 새로 생기거나 값이 바뀐 건과 사라진 건만 그날 파일에 기록한다.
+# 추이를 볼 때는 첫 스냅샷부터 변경분을 차례로 적용해 날짜별 상태를 다시 만든다.
+LEDGER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "ledger")
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def _dir(name):
+    return os.path.join(LEDGER_DIR, name)
+
+
+def _sources(name):
+    try:
+        with open(os.path.join(_dir(name), "sources.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _paths(name):
+    return sorted(glob.glob(os.path.join(_dir(name), "*.parquet")))
+
+
+def _keyed(frame, keys):
+    # 같은 키가 여러 줄이면(분할 청구 등) 나온 순서 번호를 붙여 건별로 구분한다
+    parts = [frame[k].astype(str) for k in keys] + [frame.groupby(keys, dropna=False).cumcount().astype(str)]
+    key = parts[0].str.cat(parts[1:], sep="|")
+    return frame.set_axis(pd.Index(key, name="_key"), axis=0)
+
+
+def _like(upserts, state):
+    # 변경분은 지운 건(빈 값)과 한 파일에 있어 정수가 실수로 바뀌는 등 타입이 달라질 수 있으므로 상태의 타입으로 되돌린다
+    for col, dtype in state.dtypes.items():
+        if col in upserts.columns and upserts[col].dtype != dtype:
+            try:
+                upserts[col] = upserts[col].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+    return upserts
+
+
+def _replay(paths):
+    # (스냅샷 날짜, 그날 상태) 를 차례로 돌려준다
+    state = None
+    for path in paths:
+        delta = pd.read_parquet(path)
+        upserts = delta[~delta["_deleted"]].drop(columns="_deleted")
+        state = upserts if state is None else pd.concat([state.drop(index=delta.index, errors="ignore"), _like(upserts, state)])
+        yield pd.Timestamp(os.path.basename(path)[:10]), state
+
+
+def _changed(current, previous):
+    # 값이 하나라도 다른 행 (둘 다 비어 있으면 같은 값으로 본다)
+    previous = previous.reindex(index=current.index, columns=current.columns)
+    same = (current == previous) | (current.isna() & previous.isna())
+    return ~same.all(axis=1)
+
+
+def record(name, sha, frame, keys):
+    # 오늘 날짜 스냅샷으로 기록한다. 같은 파일은 한 번만, 같은 날 다시 올리면 그날 스냅샷을 새 파일 기준으로 바꾼다
+    with _lock:
+        sources = _sources(name)
+        if sha in sources:
+            return None
+        as_of = date.today().isoformat()
+        path = os.path.join(_dir(name), f"{as_of}.parquet")
+        previous = None
+        for _, previous in _replay([p for p in _paths(name) if p != path]):
+            pass
+
+        current = _keyed(frame, keys)
+        if previous is None:
+            delta = current.assign(_deleted=False)
+        else:
+            changed = current[_changed(current, previous)]
+            deleted = previous.index.difference(current.index)
+            delta = pd.concat([
+                changed.assign(_deleted=False),
+                # 사라진 건은 키만 있으면 되지만 컬럼 타입은 현재 표와 같게 둔다 (object 로 바뀌지 않게)
+                current.iloc[:0].reindex(pd.Index(deleted, name="_key")).assign(_deleted=True),
+            ])
+
+        os.makedirs(_dir(name), exist_ok=True)
+        delta.to_parquet(f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        sources[sha] = as_of
+        with open(os.path.join(_dir(name), "sources.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(sources, f, ensure_ascii=False)
+        os.replace(os.path.join(_dir(name), "sources.json.tmp"), os.path.join(_dir(name), "sources.json"))
+        return {"date": as_of, "rows": len(current), "changed": int((~delta["_deleted"]).sum()), "deleted": int(delta["_deleted"].sum())}
+
+
+def trend(name, summarize):
+    # 스냅샷 날짜별로 summarize(state, 날짜) 결과(Series)를 한 줄씩 모은 표. 파일이 바뀌었을 때만 다시 계산한다
+    paths = _paths(name)
+    version = (summarize.__module__, summarize.__qualname__, tuple((p, os.path.getmtime(p)) for p in paths))
+    with _lock:
+        cached = _cache.get((name, summarize.__qualname__))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        rows = {as_of: summarize(state, as_of) for as_of, state in _replay(paths)}
+        result = pd.DataFrame(rows).T.rename_axis("스냅샷일자")
+        _cache[(name, summarize.__qualname__)] = (version, result)
+        return result
+
+
+def stats(name):
+    paths = _paths(name)
+    return {"snapshots": len(paths), "bytes": sum(os.path.getsize(p) for p in paths)}
@@ -0,0 +1,154 @@
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# ✅ 조치일/미조치일 분위수(p50/p90/p99) 월별 저장소
+# 일수는 정수이므로 t-digest 같은 근사 요약 대신 (접수년월, 담당자, 지표, 일수) 별 건수 히스토그램을 월 단위 Parquet 파일로 쌓는다.
+# 건수를 더하기만 하면 분기/연도/전체로 합쳐지므로 원본 행을 다시 읽지 않고, 합친 뒤의 분위수도 근사가 아니라 정확하다.
+# 새 파일이 들어오면 그 파일에 들어 있는 달 중 히스토그램이 바뀐 달의 파일만 다시 쓰고, 나머지 달은 그대로 둔다.
+# 달마다 그 달을 마지막으로 쓴 파일의 기준일(파일에 나오는 가장 늦은 날짜)을 남겨 두고, 기준일이 그보다 이른 파일은
+# 그 달을 바꾸지 않는다. 그래서 예전 파일이나 일부 기간만 뽑은 파일을 나중에 올려도 최신 이력을 덮어쓰지 않는다.
+SKETCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "history", "조치일")
+KEYS = ["접수담당자"]
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+# 기간 단위 → pandas 기간 코드
+PERIODS = {"월": "M", "분기": "Q", "연도": "Y"}
+
+_lock = threading.Lock()
+_sources = None
+_months = None
+_cache = {"version": None, "data": None}
+
+
+def _sources_path():
+    return os.path.join(SKETCH_DIR, "sources.json")
+
+
+def _load_sources():
+    global _sources
+    if _sources is None:
+        try:
+            with open(_sources_path(), encoding="utf-8") as f:
+                _sources = json.load(f)
+        except FileNotFoundError:
+            _sources = {}
+    return _sources
+
+
+def _months_path():
+    return os.path.join(SKETCH_DIR, "months.json")
+
+
+def _load_months():
+    # 달("YYYY-MM") → 그 달 히스토그램을 쓴 파일의 기준일("YYYY-MM-DD")
+    global _months
+    if _months is None:
+        try:
+            with open(_months_path(), encoding="utf-8") as f:
+                _months = json.load(f)
+        except FileNotFoundError:
+            _months = {}
+    return _months
+
+
+def _write_json(path, data):
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def _month_path(month):
+    return os.path.join(SKETCH_DIR, f"{month:%Y-%m}.parquet")
+
+
+def histogram(df, metric, value):
+    # 행 → 접수년월(월 첫날) + 담당자 + 지표 + 일수 별 건수. 접수일자나 일수가 없는 행은 뺀다
+    rows = df[df[value].notna() & df['AS접수일자'].notna()]
+    rows = rows.assign(
+        접수년월=rows['AS접수일자'].dt.to_period('M').dt.start_time,
+        지표=metric,
+        일수=rows[value].astype('int64'),
+    )
+    return rows.groupby(['접수년월'] + KEYS + ['지표', '일수']).size().rename('건수').reset_index()
+
+
+def has(sha):
+    with _lock:
+        return sha in _load_sources()
+
+
+def update(sha, sketches, as_of):
+    # sketches: histogram() 결과, as_of: 파일 기준일. 파일에 들어 있는 달 중 기준일이 그 달의 기준일보다 이르지 않은 달만 바꾼다
+    as_of = f"{pd.Timestamp(as_of):%Y-%m-%d}"
+    with _lock:
+        sources = _load_sources()
+        if sha in sources:
+            return []
+        months = _load_months()
+        os.makedirs(SKETCH_DIR, exist_ok=True)
+        changed, stale = [], []
+        for month, rows in sketches.groupby("접수년월"):
+            name = f"{month:%Y-%m}"
+            if months.get(name, "") > as_of:
+                stale.append(name)
+                continue
+            months[name] = as_of
+            rows = rows[KEYS + ['지표', '일수', '건수']].sort_values(KEYS + ['지표', '일수']).reset_index(drop=True)
+            path = _month_path(month)
+            if os.path.exists(path) and pd.read_parquet(path).equals(rows):
+                continue
+            rows.to_parquet(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+            changed.append(name)
+        sources[sha] = {"at": time.time(), "as_of": as_of, "months": sketches["접수년월"].nunique(), "changed": changed, "stale": stale}
+        _write_json(_months_path(), months)
+        _write_json(_sources_path(), sources)
+        return changed
+
+
+def load():
+    # 쌓인 히스토그램 전체. 파일이 바뀌었을 때만 다시 읽는다
+    paths = sorted(glob.glob(os.path.join(SKETCH_DIR, "*.parquet")))
+    version = [(p, os.path.getmtime(p)) for p in paths]
+    with _lock:
+        if _cache["version"] != version:
+            frames = [pd.read_parquet(p).assign(접수년월=pd.Timestamp(os.path.basename(p)[:7])) for p in paths]
+            data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["접수년월"] + KEYS + ['지표', '일수', '건수'])
+            _cache.update(version=version, data=data)
+        return _cache["data"]
+
+
+def sources():
+    with _lock:
+        return dict(_load_sources())
+
+
+def quantiles(sketches, by):
+    # 히스토그램을 by + 지표 별로 합친 뒤 누적 건수로 분위수를 찾는다.
+    # 분위수 q = 건수의 q 이상이 그 일수 이하인 가장 작은 일수 (원본 행으로 구한 inverted_cdf 분위수와 같다)
+    groups = by + ['지표']
+    merged = sketches.groupby(groups + ['일수'])['건수'].sum().reset_index()
+    grouped = merged.groupby(groups, sort=False)
+    cum = grouped['건수'].cumsum()
+    total = grouped['건수'].transform('sum')
+
+    result = merged.assign(일수합=merged['일수'] * merged['건수']).groupby(groups).agg(
+        건수=('건수', 'sum'), 일수합=('일수합', 'sum'), 최대=('일수', 'max')
+    )
+    result.insert(1, '평균', (result.pop('일수합') / result['건수']).round(1))
+    for name, q in QUANTILES.items():
+        # 부동소수 오차로 필요한 건수가 하나 늘지 않도록 올림 전에 아주 작은 값을 뺀다
+        hit = merged[cum >= np.ceil(q * total - 1e-9)]
+        result.insert(len(result.columns) - 1, name, hit.groupby(groups)['일수'].first())
+    return result.reset_index()
+
+
+def by_period(sketches, period):
+    # 접수년월 → 기간 이름 (월 "2024-03", 분기 "2024Q1", 연도 "2024")
+    return sketches.assign(기간=sketches['접수년월'].dt.to_period(PERIODS[period]).astype(str))
@@ -0,0 +1,91 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import budget
+
+# ✅ 단계별 결과 기억 (파싱 → 필터 → 분류 → 집계 → 엑셀)
+# 단계마다 입력(앞 단계 이름 또는 run() 에 넘긴 값)을 선언해 두면, 입력 fingerprint 가 같은 단계는 다시 계산하지 않는다.
+# 단계 fingerprint 는 입력 fingerprint 로만 정해지므로, 결과가 남아 있으면 그 앞 단계는 실행하지도 않는다.
+# 결과는 서버 전체가 함께 쓰며(읽기 전용), 결과 크기 합이 MAX_MB 를 넘으면 가장 오래 쓰지 않은 결과부터 버린다.
+# 크기는 결과를 넣을 때 한 번만 잰다 (budget.size: 표는 deep 메모리, 엑셀 등 bytes 는 길이).
+MAX_MB = 256
+
+_lock = threading.Lock()
+# 키 → (결과, 크기)
+_cache = OrderedDict()
+_bytes = 0
+_stats = {}
+
+
+def _hash(*parts):
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class Pipeline:
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+
+    def stage(self, *inputs):
+        # 데코레이터. 함수 이름이 단계 이름이고, 함수는 inputs 순서대로 값을 받는다
+        def register(fn):
+            self.stages[fn.__name__] = (fn, inputs)
+            return fn
+        return register
+
+    def _fingerprint(self, name, fingerprints):
+        if name not in fingerprints:
+            fn, inputs = self.stages[name]
+            fingerprints[name] = _hash(self.name, fn.__qualname__, *(self._fingerprint(i, fingerprints) for i in inputs))
+        return fingerprints[name]
+
+    def _value(self, name, values, fingerprints):
+        if name in values:
+            return values[name]
+        fn, inputs = self.stages[name]
+        key = (self.name, name, self._fingerprint(name, fingerprints))
+        with _lock:
+            stats = _stats.setdefault(f"{self.name}.{name}", {"hits": 0, "misses": 0})
+            if key in _cache:
+                _cache.move_to_end(key)
+                stats["hits"] += 1
+                values[name] = _cache[key][0]
+                return values[name]
+        value = fn(*(self._value(i, values, fingerprints) for i in inputs))
+        _remember(key, value, stats)
+        values[name] = value
+        return value
+
+    def run(self, targets, versions=None, **inputs):
+        # targets 단계 결과 목록. 표처럼 repr 로 구분할 수 없는 입력은 versions 에 버전(파일 fingerprint 등)을 준다
+        versions = versions or {}
+        fingerprints = {}
+        for name, value in inputs.items():
+            if name not in versions and isinstance(value, (pd.DataFrame, pd.Series)):
+                raise ValueError(f"'{name}' 입력의 버전(versions)이 필요합니다.")
+            fingerprints[name] = _hash(name, str(versions[name]) if name in versions else repr(value))
+        values = dict(inputs)
+        return [self._value(target, values, fingerprints) for target in targets]
+
+
+def _remember(key, value, stats):
+    global _bytes
+    size = budget.size(value)
+    with _lock:
+        stats["misses"] += 1
+        if key in _cache:
+            _bytes -= _cache.pop(key)[1]
+        _cache[key] = (value, size)
+        _bytes += size
+        # 방금 넣은 결과는 한도보다 커도 남긴다 (같은 실행에서 바로 다시 쓰므로)
+        while _bytes > MAX_MB * budget.MB and len(_cache) > 1:
+            _bytes -= _cache.popitem(last=False)[1][1]
+
+
+def stats():
+    # 단계별 재사용/계산 횟수
+    with _lock:
+        return {name: dict(counts) for name, counts in _stats.items()}
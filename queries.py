@@ -0,0 +1,99 @@
+from itertools import combinations
+
+import pandas as pd
+
+# ✅ DuckDB 가 설치되어 있으면 집계를 내장 컬럼형 SQL 엔진(멀티코어, 서버 없음)으로 실행하고,
+#    설치되어 있지 않으면 기존과 같은 pandas 연산으로 계산한다.
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def sql(query, **frames):
+    # frames 로 넘긴 DataFrame 을 같은 이름의 테이블로 등록해 쿼리를 실행한다
+    con = duckdb.connect()
+    try:
+        for name, frame in frames.items():
+            con.register(name, frame)
+        return con.execute(query).df()
+    finally:
+        con.close()
+
+
+def aggregate(df, by, aggs):
+    # by 컬럼별로 aggs({컬럼: 'sum' | 'count'}) 를 집계한다. 키가 비어 있는 행은 제외 (pivot_table 과 동일)
+    values = list(aggs)
+    if duckdb is None or df.empty:
+        return df.groupby(by)[values].agg(aggs).reset_index()
+
+    keys = ", ".join(_quote(c) for c in by)
+    select = ", ".join(
+        [_quote(c) for c in by] +
+        [f"COALESCE({aggs[c].upper()}({_quote(c)}), 0) AS {_quote(c)}" for c in values]
+    )
+    where = " AND ".join(f"{_quote(c)} IS NOT NULL" for c in by)
+    result = sql(f"SELECT {select} FROM df WHERE {where} GROUP BY {keys} ORDER BY {keys}", df=df[by + values])
+
+    # DuckDB 의 정수 합계(HUGEINT)는 실수로 넘어오므로 pandas 와 같은 정수형으로 되돌린다
+    for c in values:
+        if aggs[c] == "sum" and pd.api.types.is_integer_dtype(df[c]):
+            result[c] = result[c].astype("int64")
+    return result
+
+
+def crosstab(df, index, columns, values=None, margins_name=None):
+    # index × columns 건수 교차표. values 를 주면 그 컬럼에 값이 있는 행만 센다
+    if duckdb is None or df.empty:
+        grouped = df.groupby([index, columns])
+        counts = grouped[values].count() if values else grouped.size()
+    else:
+        counted = _quote(values) if values else "*"
+        frame = df[[index, columns] + ([values] if values else [])]
+        counts = sql(
+            f"SELECT {_quote(index)}, {_quote(columns)}, COUNT({counted}) AS n FROM df "
+            f"WHERE {_quote(index)} IS NOT NULL AND {_quote(columns)} IS NOT NULL "
+            f"GROUP BY {_quote(index)}, {_quote(columns)}",
+            df=frame,
+        ).set_index([index, columns])["n"]
+
+    table = counts.unstack(fill_value=0)
+    if margins_name:
+        table[margins_name] = table.sum(axis=1)
+        table.loc[margins_name] = table.sum()
+    return table
+
+
+def rollup(df, by, aggs, label="전체"):
+    # by 컬럼의 모든 조합 단계(예: (담당자, 제품군), (담당자), (제품군), 전체)를 한 번에 집계한다.
+    # 묶지 않은 단계의 키 자리는 label 로 채운다. 키가 비어 있는 행은 그 키로 묶는 단계에서만 제외
+    values = list(aggs)
+    if duckdb is None or df.empty:
+        levels = []
+        for n in range(len(by), -1, -1):
+            for keys in combinations(by, n):
+                if keys:
+                    level = df.groupby(list(keys))[values].agg(aggs).reset_index()
+                else:
+                    level = df[values].agg(aggs).to_frame().T
+                levels.append(level.assign(**{c: label for c in by if c not in keys}))
+        result = pd.concat(levels, ignore_index=True)[by + values]
+    else:
+        keys = ", ".join(_quote(c) for c in by)
+        select = ", ".join(
+            [f"CASE WHEN GROUPING({_quote(c)}) = 1 THEN '{label}' ELSE CAST({_quote(c)} AS VARCHAR) END AS {_quote(c)}" for c in by] +
+            [f"COALESCE({aggs[c].upper()}({_quote(c)}), 0) AS {_quote(c)}" for c in values]
+        )
+        having = " AND ".join(f"(GROUPING({_quote(c)}) = 1 OR {_quote(c)} IS NOT NULL)" for c in by)
+        result = sql(f"SELECT {select} FROM df GROUP BY CUBE ({keys}) HAVING {having}", df=df[by + values])
+
+    for c in values:
+        if aggs[c] == "count" or pd.api.types.is_integer_dtype(df[c]):
+            result[c] = result[c].astype("int64")
+        else:
+            result[c] = result[c].astype("float64")
+    return result.sort_values(by, kind="stable", ignore_index=True, key=lambda s: s.astype(str))
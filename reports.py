@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+import datasets
+
+# ✅ 예약 집계 결과 저장소
+# inbox 폴더에 들어온 최신 ERP 파일로 기능별 결과표와 엑셀을 미리 만들어 버전별 폴더에 보관하고,
+# 파일을 올리지 않은 사용자에게는 가장 최근 버전을 읽기 전용으로 바로 보여준다.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INBOX_DIR = os.path.join(BASE_DIR, "inbox")
+REPORT_DIR = os.path.join(BASE_DIR, ".cache", "reports")
+
+# 보관할 버전 수, 이 시간이 지나면 오래된 결과로 표시
+KEEP_VERSIONS = 5
+STALE_HOURS = 24
+
+
+def inbox_files():
+    # inbox 의 엑셀 파일과 수정 시각 (엑셀이 열어 둔 임시 파일 ~$ 는 제외)
+    if not os.path.isdir(INBOX_DIR):
+        return {}
+    return {
+        name: os.path.getmtime(os.path.join(INBOX_DIR, name))
+        for name in os.listdir(INBOX_DIR)
+        if name.lower().endswith(".xlsx") and not name.startswith("~$")
+    }
+
+
+def versions():
+    # manifest.json 까지 기록된(완성된) 버전만, 오래된 순
+    if not os.path.isdir(REPORT_DIR):
+        return []
+    return sorted(v for v in os.listdir(REPORT_DIR) if os.path.exists(os.path.join(REPORT_DIR, v, "manifest.json")))
+
+
+def _write_manifest(version, manifest):
+    path = os.path.join(REPORT_DIR, version, "manifest.json")
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def read_manifest(version):
+    with open(os.path.join(REPORT_DIR, version, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["version"] = version
+    return manifest
+
+
+def latest():
+    found = versions()
+    return read_manifest(found[-1]) if found else None
+
+
+def publish(sources, inbox, tools, errors=None):
+    # sources: {데이터셋: {"name", "mtime", "sha"}}, inbox: 집계 당시 inbox 목록, tools: {기능: (결과표 dict, 엑셀 bytes)}
+    # errors: 집계하지 못한 파일/기능 {이름: 오류}
+    version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = os.path.join(REPORT_DIR, version)
+    os.makedirs(path)
+    for tool, (results, xlsx) in tools.items():
+        pd.to_pickle(results, os.path.join(path, f"{tool}.pkl"))
+        with open(os.path.join(path, f"{tool}.xlsx"), "wb") as f:
+            f.write(xlsx)
+    # manifest 를 마지막에 써야 만들다 만 버전이 보이지 않는다
+    _write_manifest(version, {"created": time.time(), "sources": sources, "inbox": inbox, "tools": sorted(tools), "errors": errors or {}})
+    for old in versions()[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(REPORT_DIR, old), ignore_errors=True)
+    return version
+
+
+def touch(version, inbox):
+    # 내용이 같은 파일만 다시 들어온 경우: 결과는 그대로 두고 확인한 inbox 목록만 갱신
+    manifest = read_manifest(version)
+    del manifest["version"]
+    manifest["inbox"] = inbox
+    _write_manifest(version, manifest)
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _load(version, tool):
+    # 모든 세션이 같은 결과를 함께 본다 (읽기 전용)
+    path = os.path.join(REPORT_DIR, version)
+    results = pd.read_pickle(os.path.join(path, f"{tool}.pkl"))
+    with open(os.path.join(path, f"{tool}.xlsx"), "rb") as f:
+        xlsx = f.read()
+    return results, xlsx
+
+
+def serve(tool, inputs):
+    # 이 세션에서 inputs 중 하나라도 업로드했으면 예약 집계 대신 업로드한 파일로 분석한다
+    registry = datasets.registry()
+    if any(key in registry for key in inputs):
+        return None
+    manifest = latest()
+    if manifest is None or tool not in manifest["tools"]:
+        return None
+
+    created = datetime.fromtimestamp(manifest["created"])
+    hours = (time.time() - manifest["created"]) / 3600
+    names = ", ".join(f"'{manifest['sources'][key]['name']}'" for key in inputs)
+    text = f"{created:%Y-%m-%d %H:%M} 에 {names} 파일로 미리 집계한 결과입니다. 다른 파일로 분석하려면 위에서 업로드하세요."
+    if hours >= STALE_HOURS:
+        st.warning(f"⚠️ 집계한 지 {hours:.0f}시간이 지났습니다. {text}")
+    else:
+        st.info(f"🗓️ {text}")
+    if inbox_files() != manifest["inbox"]:
+        st.caption("🔄 inbox 에 새 파일이 들어와 다시 집계하는 중입니다. 잠시 후 새로고침하세요.")
+
+    results, xlsx = _load(manifest["version"], tool)
+    return {"results": results, "xlsx": xlsx, "version": manifest["version"]}
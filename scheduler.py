@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+import traceback
+
+import streamlit as st
+
+import AS_PROCESS
+import Accounts
+import AS_summary
+import PRPO
+import accounts_summary
+import datasets
+import jobs
+import project
+import reports
+
+# ✅ inbox 확인 간격(초)
+POLL_SECONDS = 60
+
+# ✅ 미리 집계해 둘 기능과 기능별로 읽는 데이터셋(헤더 줄)
+TOOLS = {
+    "AS_summary": (AS_summary, {"AS현황": 0}),
+    "accounts_summary": (accounts_summary, {"AS현황": 0, "AS비용현황": None}),
+    "PRPO": (PRPO, {"구매요청현황": None}),
+    "project": (project, {"프로젝트": None}),
+}
+
+
+def _error(e):
+    return f"{type(e).__name__}: {e}"
+
+
+def inbox_sources(inbox=None, errors=None):
+    # inbox 의 종류별 가장 최근 파일 ({종류: 파일 정보}, {종류: 경로}). 파일 내용은 메모리로 읽지 않고 경로째 판별한다
+    # 열 수 없거나 판별할 수 없는 파일은 건너뛰고, errors 를 넘기면 {파일 이름: 오류} 를 남긴다
+    inbox = reports.inbox_files() if inbox is None else inbox
+    errors = {} if errors is None else errors
+    sources, paths = {}, {}
+    for name, mtime in sorted(inbox.items(), key=lambda item: item[1]):
+        path = os.path.join(reports.INBOX_DIR, name)
+        try:
+            sniffed = datasets.sniff(path)
+            if sniffed["key"] is None:
+                if sniffed.get("error") is not None:
+                    errors[name] = _error(sniffed["error"])
+                continue
+            sha = datasets.file_sha(path)
+        except Exception as e:
+            errors[name] = _error(e)
+            continue
+        sources[sniffed["key"]] = {"name": name, "mtime": mtime, "sha": sha}
+        paths[sniffed["key"]] = path
+    return sources, paths
+
+
+def _record(errors, label, fn):
+    # 이력/스냅샷 기록 하나가 실패해도 나머지 기록과 기능별 집계는 계속한다
+    try:
+        fn()
+    except Exception as e:
+        traceback.print_exc()
+        errors[label] = _error(e)
+
+
+def refresh():
+    # inbox 가 바뀌었으면 종류별 가장 최근 파일로 기능별 결과를 다시 만든다. 새 버전 이름 또는 None
+    inbox = reports.inbox_files()
+    manifest = reports.latest()
+    if not inbox or (manifest is not None and manifest["inbox"] == inbox):
+        return None
+
+    # 파일/기능 하나가 실패해도 나머지는 집계해 게시하고, 실패는 manifest 의 errors 에 남긴다
+    # (게시한 inbox 목록이 그대로면 다음 확인 때 같은 파일을 다시 시도하지 않는다)
+    errors = {}
+    sources, paths = inbox_sources(inbox, errors)
+
+    shas = {key: source["sha"] for key, source in sources.items()}
+    if manifest is not None and {key: source["sha"] for key, source in manifest["sources"].items()} == shas:
+        reports.touch(manifest["version"], inbox)
+        return None
+
+    frames = {}
+    for key, path in paths.items():
+        try:
+            frames[key] = datasets.read(key, path, sources[key]["sha"])
+        except Exception as e:
+            traceback.print_exc()
+            errors[sources.pop(key)["name"]] = _error(e)
+
+    if "AS현황" in frames:
+        sha = sources["AS현황"]["sha"][:16]
+        _record(errors, "처리율 이력", lambda: AS_PROCESS.record_history(datasets.view(frames["AS현황"], 1), sha))
+        _record(errors, "AS 요약 스케치", lambda: AS_summary.record_sketches(AS_summary.prepare(datasets.view(frames["AS현황"], 0)), sha))
+    if "대금청구현황" in frames:
+        sha = sources["대금청구현황"]["sha"][:16]
+        _record(errors, "대금청구 스냅샷", lambda: Accounts.record_snapshot(Accounts.prepare(datasets.view(frames["대금청구현황"])), sha))
+
+    tools = {}
+    for tool, (module, headers) in TOOLS.items():
+        if not all(key in frames for key in headers):
+            continue
+        try:
+            fingerprint = "-".join(sources[key]["sha"][:16] for key in headers)
+            views = [datasets.view(frames[key], header) for key, header in headers.items()]
+            tools[tool] = jobs.submit(f"{tool}-{fingerprint}", jobs.build_job, tool, *views).future.result()
+            if tool == "accounts_summary":
+                accounts_summary.record_snapshot(tools[tool][0], fingerprint)
+        except Exception as e:
+            # 한 기능이 실패해도 나머지 기능 결과는 게시한다
+            traceback.print_exc()
+            errors[tool] = _error(e)
+    return reports.publish(sources, inbox, tools, errors)
+
+
+def _watch():
+    while True:
+        try:
+            refresh()
+        except Exception:
+            traceback.print_exc()
+        time.sleep(POLL_SECONDS)
+
+
+@st.cache_resource
+def start():
+    # 서버 프로세스당 감시 스레드 하나만 띄운다
+    thread = threading.Thread(target=_watch, name="report-scheduler", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,119 @@
+import glob
+import json
+import os
+import threading
+import time
+import weakref
+
+import pandas as pd
+import pyarrow as pa
+
+# ✅ 서버 전체가 함께 쓰는 파싱 결과 저장소
+# 같은 ERP 파일은 Arrow IPC 파일로 한 번만 기록하고, 메모리 매핑(읽기 전용)한 표를 pandas 표로 한 번만 바꿔 모든 세션이 같은 표를 쓴다.
+# (pandas 로 바꿀 때 빈 값이 있는 컬럼, 날짜, object 컬럼은 매핑과 별도로 한 벌 만들어지지만 세션 수와 상관없이 한 벌뿐이다)
+# 세션은 표를 고치지 않는다. datasets.view() 가 얕은 복사본을 넘기고, pandas Copy-on-Write 로 고친 세션에만 사본이 생긴다.
+# 세션마다 Lease 를 들고 있다가, Lease 가 버려지면(데이터 교체/초기화/세션 종료) 참조 수가 줄고 0 이 되면 메모리에서 내린다.
+# 파일은 바로 지우지 않고 다시 acquire 할 수 있게 남겨 두며, STORE_MAX_AGE(초) 동안 아무도 쓰지 않으면 다음 publish 때 지운다.
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "store")
+STORE_MAX_AGE = 6 * 3600
+
+_lock = threading.Lock()
+_tables = {}
+
+
+class Lease:
+    def __init__(self, name, df):
+        self.name = name
+        self.df = df
+        weakref.finalize(self, release, name)
+
+
+def _path(name):
+    return os.path.join(STORE_DIR, f"{name}.arrow")
+
+
+def _to_table(df):
+    # Arrow 필드 이름은 위치 번호로 두고 원래 컬럼 이름(두 줄 헤더면 튜플)은 스키마 메타데이터에 남긴다
+    # (그대로 넘기면 MultiIndex 컬럼이 "('접수정보', 'AS접수번호')" 같은 문자열이 되고, 중복 컬럼명은 넘길 수 없다)
+    columns = [list(col) if isinstance(col, tuple) else col for col in df.columns]
+    flat = df.set_axis([str(i) for i in range(len(df.columns))], axis=1)
+    table = pa.Table.from_pandas(flat, preserve_index=False)
+    return table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"columns": json.dumps(columns, ensure_ascii=False, default=str).encode("utf-8"),
+    })
+
+
+def _to_frame(table):
+    df = table.to_pandas(split_blocks=True)
+    saved = (table.schema.metadata or {}).get(b"columns")
+    if saved is None:
+        return df
+    columns = json.loads(saved)
+    if any(isinstance(col, list) for col in columns):
+        return df.set_axis(pd.MultiIndex.from_tuples([tuple(col) for col in columns]), axis=1)
+    return df.set_axis(columns, axis=1)
+
+
+def _prune():
+    # 메모리에 올라와 있지 않고 STORE_MAX_AGE 동안 쓰지 않은 파일을 지운다 (수정 시각 = 마지막으로 쓴 시각)
+    for path in glob.glob(os.path.join(STORE_DIR, "*.arrow")):
+        if os.path.basename(path)[:-len(".arrow")] in _tables:
+            continue
+        try:
+            if time.time() - os.path.getmtime(path) > STORE_MAX_AGE:
+                os.remove(path)
+        except OSError:
+            # Windows 에서는 아직 매핑이 남아 있으면 지울 수 없다. 다음 정리 때 다시 지운다
+            pass
+
+
+def publish(name, df):
+    path = _path(name)
+    with _lock:
+        if name not in _tables and not os.path.exists(path):
+            os.makedirs(STORE_DIR, exist_ok=True)
+            table = _to_table(df)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+        _prune()
+    return acquire(name)
+
+
+def acquire(name):
+    # 저장소에 없는 데이터셋이면 None
+    with _lock:
+        item = _tables.get(name)
+        if item is None:
+            if not os.path.exists(_path(name)):
+                return None
+            # 파일 내용을 읽어 들이지 않고 매핑만 하므로 여러 세션이 같은 페이지를 공유한다
+            table = pa.ipc.open_file(pa.memory_map(_path(name), "r")).read_all()
+            item = _tables[name] = {"table": table, "df": _to_frame(table), "refs": 0}
+            try:
+                os.utime(_path(name))
+            except OSError:
+                pass
+        item["refs"] += 1
+        df = item["df"]
+    return Lease(name, df)
+
+
+def release(name):
+    with _lock:
+        item = _tables.get(name)
+        if item is None:
+            return
+        item["refs"] -= 1
+        if item["refs"] > 0:
+            return
+        # 메모리에서만 내린다. 파일은 남겨 두었다가 다시 acquire 하면 다시 매핑한다
+        del _tables[name]
+
+
+def stats():
+    with _lock:
+        return {name: item["refs"] for name, item in _tables.items()}
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+# ✅ AS 처리기간 곡선 (접수 → 기술적종료)
+# 코호트(접수년월 / 제품군 / 담당자 조합)마다 "접수 후 N일 안에 종료된 건의 비율"을 N = 0..최대 일수로 계산한다.
+# 아직 종료되지 않은 건은 기준일까지 지난 일수만큼만 관측된 것으로 보고(중도절단) 그 뒤의 분모에서 뺀다 (Kaplan-Meier).
+# 그래서 최근 접수월처럼 아직 다 지켜보지 못한 코호트도 종료 비율이 낮게 잡히지 않는다.
+# 건별 일수는 데이터셋 버전마다 한 번 정렬해 두고(cases), 코호트별 누적 건수를 searchsorted 로 한꺼번에 구하므로
+# 코호트나 조건을 바꿔 다시 그려도 행이나 코호트마다 반복하지 않는다.
+COHORTS = {"접수년월": "접수년월", "제품군": "제품군", "담당자": "접수담당자"}
+MILESTONES = [7, 30, 90, 180, 365]
+AGING_BINS = [0, 30, 90, 180, 365, np.inf]
+AGING_LABELS = ["30일 이하", "31~90일", "91~180일", "181~365일", "365일 초과"]
+# 곡선 그래프에 그리는 최대 코호트 수 (건수가 많은 순). 표에는 모든 코호트가 나온다
+MAX_PLOTTED = 20
+
+
+def cases(df, as_of):
+    # 건별 코호트 컬럼 + 일수(종료 건은 처리일수, 미종료 건은 기준일까지 지난 일수) + 종료 여부. 일수 순으로 정렬해 둔다
+    # df: AS접수일자/기술적종료일자(날짜), 제품군, 접수담당자
+    df = df[df['AS접수일자'].notna()]
+    closed = df['기술적종료일자'].notna()
+    end = df['기술적종료일자'].where(closed, as_of)
+    # 접수년월은 행마다 strftime 하지 않고 고유한 달만 문자열로 바꿔 펼친다
+    codes, months = df['AS접수일자'].dt.to_period('M').factorize()
+    frame = pd.DataFrame({
+        '접수년월': months.strftime('%Y-%m').to_numpy()[codes],
+        '제품군': df['제품군'],
+        '접수담당자': df['접수담당자'],
+        '일수': (end - df['AS접수일자']).dt.days.clip(lower=0).astype('int64'),
+        '종료': closed,
+    })
+    frame[['제품군', '접수담당자']] = frame[['제품군', '접수담당자']].fillna('미지정')
+    return frame.sort_values('일수', kind='stable').reset_index(drop=True)
+
+
+def _counts_within(keyed, n_groups, width, days):
+    # 코호트번호 * width + 일수 로 정렬된 배열 → [코호트, N] 별 일수 <= N 인 건수
+    starts = np.searchsorted(keyed, np.arange(n_groups) * width, side='left')
+    queries = np.arange(n_groups)[:, None] * width + days[None, :]
+    return np.searchsorted(keyed, queries, side='right') - starts[:, None]
+
+
+def curves(cases, by, max_days=365):
+    # by 별 N일(0..max_days) 내 종료 비율. 반환: by + 코호트(이름) + 일수, 관측건수(N일째 아직 열려 있고 관측 중인 건), 종료비율(%)
+    days = np.arange(max_days + 1)
+    columns = by + ['코호트', '일수', '관측건수', '종료비율(%)']
+    if cases.empty:
+        return pd.DataFrame(columns=columns)
+
+    if by:
+        grouped = cases.groupby(by, sort=True)
+        codes = grouped.ngroup().to_numpy()
+        keys = grouped.size().index
+    else:
+        codes = np.zeros(len(cases), dtype=np.int64)
+        keys = None
+    n_groups = int(codes.max()) + 1
+
+    # 코호트번호로 안정 정렬하면 코호트 안에서는 cases 의 일수 순서가 그대로 유지된다 (일수 정렬은 한 번만)
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    elapsed = np.minimum(cases['일수'].to_numpy()[order], max_days + 1)
+    closed = cases['종료'].to_numpy()[order]
+    width = max_days + 2
+    events = _counts_within(codes[closed] * width + elapsed[closed], n_groups, width, days)
+    censored = _counts_within(codes[~closed] * width + elapsed[~closed], n_groups, width, days)
+
+    # N일째 관측 중인 건 = 전체 - (N-1)일까지 종료 - (N-1)일까지 관측이 끝난 미종료 건
+    total = np.bincount(codes, minlength=n_groups)[:, None]
+    events_before = np.pad(events[:, :-1], ((0, 0), (1, 0)))
+    censored_before = np.pad(censored[:, :-1], ((0, 0), (1, 0)))
+    at_risk = total - events_before - censored_before
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hazard = np.where(at_risk > 0, (events - events_before) / at_risk, 0.0)
+    closed_share = (1 - np.cumprod(1 - hazard, axis=1)) * 100
+    # 관측 중인 건이 하나도 없는 N 부터는 알 수 없으므로 비운다
+    closed_share[at_risk == 0] = np.nan
+
+    # 코호트 이름은 코호트마다 한 번만 만들어 일수만큼 반복한다
+    if keys is not None:
+        labels = keys.to_frame(index=False)
+        names = [" / ".join(map(str, key)) for key in labels.itertuples(index=False)]
+    else:
+        names = ["전체"]
+    result = pd.DataFrame({
+        '코호트': np.repeat(names, len(days)),
+        '일수': np.tile(days, n_groups),
+        '관측건수': at_risk.ravel(),
+        '종료비율(%)': closed_share.ravel().round(1),
+    })
+    if keys is not None:
+        result = pd.concat([labels.loc[labels.index.repeat(len(days))].reset_index(drop=True), result], axis=1)
+    return result[columns]
+
+
+def largest(curve, n=MAX_PLOTTED):
+    # 건수(0일째 관측건수)가 많은 n 개 코호트의 곡선
+    sizes = curve.loc[curve['일수'] == 0].set_index('코호트')['관측건수']
+    if len(sizes) <= n:
+        return curve
+    return curve[curve['코호트'].isin(sizes.nlargest(n).index)]
+
+
+def milestones(curve, by):
+    # 곡선 → 코호트별 7/30/90/180/365일 내 종료 비율 표
+    points = curve[curve['일수'].isin(MILESTONES)].set_index(by + ['일수'])['종료비율(%)']
+    table = points.unstack('일수') if by else points.to_frame('전체').T
+    return table.rename(columns=lambda n: f"{n}일 내")
+
+
+def aging(cases, by):
+    # 아직 열려 있는 건의 경과일수 구간별 건수 (코호트별)
+    open_cases = cases[~cases['종료']]
+    buckets = pd.cut(open_cases['일수'], AGING_BINS, labels=AGING_LABELS, include_lowest=True).rename('경과일수')
+    if not by:
+        return buckets.value_counts(sort=False).rename('미종료 건수').to_frame().T
+    return pd.crosstab([open_cases[col] for col in by], buckets).reindex(columns=AGING_LABELS, fill_value=0)
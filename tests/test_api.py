@@ -0,0 +1,85 @@
+import uuid
+
+import pandas as pd
+import pytest
+
+import api
+import PRPO
+
+PURCHASE = pd.DataFrame({
+    "구매요청상태": ["결재완료(확정)", "결재완료(확정)", "결재완료(확정)", "작성중"],
+    "구매그룹": ["G1", "G1", "G2", "G2"],
+    "프로젝트": ["P1", "P2", "P3", "P4"],
+    "요청일자": ["2024-01-01", "2024-01-05", "2024-02-01", "2024-02-01"],
+    "발주일자": ["2024-01-01", "2024-01-10", None, None],
+    "납기일자": ["2024-01-20", "2024-01-20", "2024-03-01", "2024-03-01"],
+    "최근입고일자": ["2024-01-15", "2024-02-01", None, None],
+})
+
+
+def _load(monkeypatch, frames):
+    # inbox 대신 표를 바로 올린다. 파일 sha 는 매번 새로 만들어 단계 결과 저장소에서 다른 테스트 결과를 꺼내지 않게 한다
+    sources = {key: {"name": f"{key}.xlsx", "sha": uuid.uuid4().hex} for key in frames}
+    monkeypatch.setitem(api._data, "frames", frames)
+    monkeypatch.setitem(api._data, "sources", sources)
+    return api.LocalClient()
+
+
+def test_query_matches_direct_build(monkeypatch):
+    client = _load(monkeypatch, {"구매요청현황": PURCHASE})
+    expected = api.to_json(PRPO.build(PURCHASE.copy())["입고지연 요약"])
+    result = client.query("발주입고지연", 표="입고지연 요약")
+    assert result["columns"] == expected["columns"]
+    assert result["rows"] == expected["rows"]
+
+
+def test_query_errors(monkeypatch):
+    client = _load(monkeypatch, {"구매요청현황": PURCHASE})
+    with pytest.raises(RuntimeError, match="보고서는"):
+        client.query("없는보고서")
+    with pytest.raises(RuntimeError, match="문자열"):
+        client.query("처리율", 시작=2024)
+    with pytest.raises(RuntimeError, match="객체"):
+        client._call("POST", "/query", {"report": "발주입고지연", "params": ["지연교차표"]})
+    with pytest.raises(RuntimeError, match="파라미터 오류"):
+        client.query("발주입고지연", 표="없는표")
+    with pytest.raises(RuntimeError, match="데이터가 없습니다"):
+        client.query("처리율", 시작="2024-01")
+
+
+def test_data_errors_are_not_parameter_errors(monkeypatch):
+    client = _load(monkeypatch, {"구매요청현황": PURCHASE.drop(columns="구매그룹")})
+    status, payload = api.handle("POST", "/query", {"report": "발주입고지연", "params": {}})
+    assert status == 500
+    assert "파라미터" not in payload["error"]
+    with pytest.raises(RuntimeError, match="보고서 계산 중 오류"):
+        client.query("발주입고지연")
+
+
+def test_batch_reports_each_query_separately(monkeypatch):
+    client = _load(monkeypatch, {"구매요청현황": PURCHASE})
+    results = client.batch([
+        ("발주입고지연", {}),
+        ("처리율", {"시작": 2024}),
+        {"report": "발주입고지연", "params": "지연교차표"},
+        ("발주입고지연", {"표": "없는표"}),
+        ("없는보고서", {}),
+        ("발주입고지연", {"표": "지연교차표"}),
+    ])
+    assert [r["status"] for r in results] == [200, 400, 400, 400, 404, 200]
+    assert results[-1]["rows"]
+
+
+def test_batch_turns_unexpected_errors_into_500(monkeypatch):
+    client = _load(monkeypatch, {"구매요청현황": PURCHASE})
+    answer = api.answer
+
+    def flaky(query):
+        if query.get("params", {}).get("표") == "지연교차표":
+            raise RuntimeError("boom")
+        return answer(query)
+
+    monkeypatch.setattr(api, "answer", flaky)
+    results = client.batch([("발주입고지연", {"표": "지연교차표"}), ("발주입고지연", {})])
+    assert [r["status"] for r in results] == [500, 200]
+    assert "boom" in results[0]["error"]
@@ -0,0 +1,58 @@
+import io
+import zipfile
+
+import pandas as pd
+import pyarrow.parquet as pq
+from streamlit.testing.v1 import AppTest
+
+import downloads
+
+SHEETS = {
+    "요약": pd.DataFrame({"구분": ["유상", "무상"], "건수": [3, 5]}),
+    "원본": pd.DataFrame({"AS접수번호": ["AS1", "AS2"], "금액": [1000.5, None]}),
+}
+
+
+def _button_app(helper, sheets):
+    # 도우미가 만든 값을 그대로 download_button 에 넘긴다 (Streamlit 이 받지 못하는 형식이면 예외)
+    import streamlit as st
+
+    import downloads
+
+    st.download_button("받기", data=getattr(downloads, helper)(sheets), file_name="out")
+
+
+def test_helpers_are_accepted_by_download_button():
+    for helper, sheets in [("csv_file", {"요약": SHEETS["요약"]}), ("csv_file", SHEETS), ("parquet_zip", SHEETS)]:
+        at = AppTest.from_function(_button_app, args=(helper, sheets)).run()
+        assert not at.exception, (helper, len(sheets), at.exception)
+        assert len(at.get("download_button")) == 1
+
+
+def test_single_sheet_csv_roundtrip():
+    data = downloads.csv_file({"요약": SHEETS["요약"]})
+    assert isinstance(data, bytes) and data.startswith("﻿".encode("utf-8"))
+    assert pd.read_csv(io.BytesIO(data), encoding="utf-8-sig").equals(SHEETS["요약"])
+
+
+def test_multi_sheet_csv_and_parquet_zip_roundtrip():
+    with zipfile.ZipFile(io.BytesIO(downloads.csv_file(SHEETS))) as zf:
+        assert sorted(zf.namelist()) == ["요약.csv", "원본.csv"]
+        assert pd.read_csv(zf.open("원본.csv"), encoding="utf-8-sig")["AS접수번호"].tolist() == ["AS1", "AS2"]
+    with zipfile.ZipFile(io.BytesIO(downloads.parquet_zip(SHEETS))) as zf:
+        assert sorted(zf.namelist()) == ["요약.parquet", "원본.parquet"]
+        table = pq.read_table(io.BytesIO(zf.read("원본.parquet"))).to_pandas()
+        assert table["금액"].tolist()[0] == 1000.5 and pd.isna(table["금액"].tolist()[1])
+
+
+def test_stream_buttons_render():
+    def app():
+        import pandas as pd
+
+        import downloads
+
+        downloads.stream_buttons({"표": pd.DataFrame({"a": [1, 2]})}, "결과", key="t")
+
+    at = AppTest.from_function(app).run()
+    assert not at.exception
+    assert len(at.get("download_button")) == 2
@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+import AS_PROCESS
+import history
+
+
+@pytest.fixture(autouse=True)
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_DIR", str(tmp_path))
+    monkeypatch.setattr(history, "_sources", None)
+    monkeypatch.setattr(history, "_months", None)
+    monkeypatch.setattr(history, "_cache", {"version": None, "data": None})
+
+
+def _counts(months, received, closed):
+    return pd.DataFrame({
+        "접수년월_dt": pd.to_datetime(months),
+        "AS구분": "유상",
+        "제품군": "BWMS",
+        "AS접수건수": received,
+        "조치완료건수": closed,
+    })
+
+
+def _monthly():
+    return history.load().set_index("접수년월")[history.COUNTS]
+
+
+def test_older_export_leaves_newer_months_unchanged():
+    history.update("new", _counts(["2024-01-01", "2024-02-01", "2024-03-01"], [10, 20, 30], [9, 18, 5]), "2024-03-31")
+    before = _monthly()
+
+    # 2월까지만 조치가 덜 된 예전 파일을 나중에 올린다
+    assert history.update("old", _counts(["2024-01-01", "2024-02-01"], [10, 20], [4, 6]), "2024-02-10") == []
+    assert history.sources()["old"]["stale"] == ["2024-01", "2024-02"]
+    pd.testing.assert_frame_equal(_monthly(), before)
+
+
+def test_newer_export_replaces_its_months():
+    history.update("old", _counts(["2024-01-01", "2024-02-01"], [10, 20], [4, 6]), "2024-02-10")
+    assert history.update("new", _counts(["2024-02-01", "2024-03-01"], [20, 30], [18, 5]), "2024-03-31") == ["2024-02", "2024-03"]
+    monthly = _monthly()
+    assert monthly.loc["2024-01-01", "조치완료건수"] == 4
+    assert monthly.loc["2024-02-01", "조치완료건수"] == 18
+
+
+def test_record_history_uses_the_latest_date_in_the_file():
+    def export(rows):
+        return pd.DataFrame(rows, columns=["AS접수번호", "AS접수일자", "기술적종료일자", "전자결재번호상태", "AS진행상태", "AS구분", "제품군1", "제품군2"])
+
+    newer = export([
+        ["AS1", "2024/01/05", "2024/03/20", "종결", "기술적종료", "유상", "", ""],
+        ["AS2", "2024/01/07", None, "종결", "조치중", "유상", "", ""],
+    ])
+    older = export([["AS1", "2024/01/05", None, "종결", "조치중", "유상", "", ""]])
+    AS_PROCESS.record_history(newer, "newer")
+    AS_PROCESS.record_history(older, "older")
+    assert history.sources()["newer"]["as_of"] == "2024-03-20"
+    assert history.sources()["older"]["stale"] == ["2024-01"]
+    assert _monthly()["AS접수건수"].sum() == 2
@@ -0,0 +1,67 @@
+import os
+import types
+
+import pandas as pd
+import pytest
+
+import datasets
+import jobs
+import PRPO
+import reports
+import scheduler
+
+PURCHASE = pd.DataFrame({
+    "구매요청상태": ["결재완료(확정)", "결재완료(확정)"],
+    "구매그룹": ["G1", "G2"],
+    "프로젝트": ["P1", "P2"],
+    "요청일자": ["2024-01-01", "2024-02-01"],
+    "발주일자": ["2024-01-01", None],
+    "납기일자": ["2024-01-20", "2024-03-01"],
+    "최근입고일자": ["2024-01-15", None],
+})
+
+
+@pytest.fixture
+def inbox(tmp_path, monkeypatch):
+    inbox_dir = tmp_path / "inbox"
+    inbox_dir.mkdir()
+    for name in ["구매요청.xlsx", "AS현황.xlsx", "깨진파일.xlsx"]:
+        (inbox_dir / name).write_bytes(b"not an excel file")
+    monkeypatch.setattr(reports, "INBOX_DIR", str(inbox_dir))
+    monkeypatch.setattr(reports, "REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(scheduler, "TOOLS", {"PRPO": (PRPO, {"구매요청현황": None})})
+
+    # 깨진파일.xlsx 는 실제 판별에 맡기고, 나머지 둘은 종류를 정해 준다
+    sniff = datasets.sniff
+    keys = {"구매요청.xlsx": "구매요청현황", "AS현황.xlsx": "AS현황"}
+
+    def fake_sniff(path):
+        name = os.path.basename(path)
+        return {"key": keys[name]} if name in keys else sniff(path)
+
+    monkeypatch.setattr(datasets, "sniff", fake_sniff)
+
+    def read(key, path, sha=None):
+        if key == "AS현황":
+            raise ValueError("헤더가 맞지 않습니다")
+        return PURCHASE
+
+    monkeypatch.setattr(datasets, "read", read)
+    # 작업 프로세스 없이 바로 만든다
+    monkeypatch.setattr(jobs, "submit", lambda name, fn, *args: types.SimpleNamespace(
+        future=types.SimpleNamespace(result=lambda: fn({}, None, *args))
+    ))
+    return inbox_dir
+
+
+def test_refresh_publishes_what_it_could_read(inbox):
+    version = scheduler.refresh()
+    assert version is not None
+    manifest = reports.latest()
+    assert list(manifest["sources"]) == ["구매요청현황"]
+    assert manifest["tools"] == ["PRPO"]
+    assert set(manifest["errors"]) == {"AS현황.xlsx", "깨진파일.xlsx"}
+    assert "헤더가 맞지 않습니다" in manifest["errors"]["AS현황.xlsx"]
+
+    # inbox 가 그대로면 실패한 파일을 매번 다시 시도하지 않는다
+    assert scheduler.refresh() is None
@@ -0,0 +1,61 @@
+import gc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datasets
+import store
+
+# 두 줄 헤더로 읽은 AS현황 (중복된 둘째 줄 이름과 빈 값/날짜 컬럼 포함)
+AS_STATUS = pd.DataFrame(
+    [
+        ["AS1", "종결", pd.Timestamp("2024-01-03"), "김철수", 1000.0, "비고"],
+        ["AS2", None, pd.NaT, None, np.nan, "비고"],
+    ],
+    columns=pd.MultiIndex.from_tuples([
+        ("접수정보", "AS접수번호"), ("접수정보", "전자결재번호상태"), ("접수정보", "AS접수일자"),
+        ("담당", "접수담당자"), ("비용", "금액"), ("Unnamed: 5_level_0", "금액"),
+    ]),
+)
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "STORE_DIR", str(tmp_path))
+    yield
+    store._tables.clear()
+
+
+def test_two_row_header_round_trip():
+    entry = {}
+    shared = datasets._share(entry, "AS현황-test", AS_STATUS)
+    assert isinstance(shared.columns, pd.MultiIndex)
+    assert shared.columns.equals(AS_STATUS.columns)
+    pd.testing.assert_frame_equal(shared, AS_STATUS, check_dtype=False)
+    view = datasets.view(entry["lease"].df, 1)
+    assert list(view.columns[:4]) == ["AS접수번호", "전자결재번호상태", "AS접수일자", "접수담당자"]
+    assert view["AS접수일자"].iloc[0] == pd.Timestamp("2024-01-03")
+
+
+def test_flat_columns_round_trip():
+    df = pd.DataFrame({"구매그룹": ["G1", None], "수량": [1, 2]})
+    lease = store.publish("구매요청현황-test", df)
+    assert list(lease.df.columns) == ["구매그룹", "수량"]
+    pd.testing.assert_frame_equal(lease.df, df, check_dtype=False)
+
+
+def test_sessions_share_one_frame():
+    first = store.publish("AS현황-shared", AS_STATUS)
+    second = store.acquire("AS현황-shared")
+    assert second.df is first.df
+    assert store.stats() == {"AS현황-shared": 2}
+
+
+def test_file_outlives_the_last_lease():
+    store.publish("AS현황-dropped", AS_STATUS)
+    gc.collect()
+    assert store.stats() == {}
+    lease = store.acquire("AS현황-dropped")
+    assert lease is not None
+    assert lease.df.columns.equals(AS_STATUS.columns)
@@ -1,42 +1,96 @@
-import streamlit as st
-
-# 🔁 기능별 파일 import
-import as_analysis_test
-import AS_SALES
-import accounts
-import AS_PROCESS
-import project
-import PRPO
-import AS_summary
-import accounts_summary
-
-# ✅ 페이지 설정
-st.set_page_config(page_title="AS 통합 분석 시스템", layout="wide")
-
-# ✅ 타이틀
-st.markdown("""
-    <h1 style='text-align:center;'>📊 AS 통합 분석 시스템</h1>
-    <p style='text-align:center; font-size:18px;'>아래에서 원하는 분석 기능을 선택하세요.</p>
-    <hr style="border: 1px solid #eee;">
-""", unsafe_allow_html=True)
-
-# ✅ 기능 이름과 연결할 app 함수 매핑
-app_list = {
-    "🔍 AS상태 업데이트 대상 및 결산마감 대상 선정 시스템": as_analysis_test.app,
-    "💰 유상 AS 매출 집계 시스템": AS_SALES.app,
-    "📂 미수채권(미입금) 집계 시스템": accounts.app,
-    "📈 AS 처리율 계산 시스템": AS_PROCESS.app,
-    "🗂️ AS프로젝트 대상 선정 시스템": project.app,
-    "📝 발주 및 입고지연 집계 시스템": PRPO.app,
-    "📊 AS 접수/조치/조치일 집계 시스템": AS_summary.app,
-    "📋 AS채권현황 분석 및 점검 시스템": accounts_summary.app
-}
-
-# ✅ 선택 박스 (radio를 사용해 명확한 선택 UI)
-selected_app = st.radio("👇 실행할 기능을 선택하세요:", list(app_list.keys()))
-
-# ✅ 선택된 기능 실행
-try:
-    app_list[selected_app]()  # 선택된 기능 함수 실행
-except Exception as e:
-    st.error(f"🚨 앱 실행 중 오류가 발생했습니다:\n\n{e}")
+import streamlit as st
+
+# 🔁 기능별 파일 import
+import as_analysis_test
+import AS_SALES
+import Accounts
+import AS_PROCESS
+import project
+import PRPO
+import AS_summary
+import accounts_summary
+import budget
+import datasets
+import jobs
+import reports
+import scheduler
+import store
+
+# ✅ 페이지 설정
+st.set_page_config(page_title="AS 통합 분석 시스템", layout="wide")
+
+# ✅ inbox 폴더를 감시해 기능별 결과를 미리 집계하는 스레드 (서버당 하나)
+scheduler.start()
+
+# ✅ 타이틀
+st.markdown("""
+    <h1 style='text-align:center;'>📊 AS 통합 분석 시스템</h1>
+    <p style='text-align:center; font-size:18px;'>아래에서 원하는 분석 기능을 선택하세요.</p>
+    <hr style="border: 1px solid #eee;">
+""", unsafe_allow_html=True)
+
+# ✅ 기능 이름과 연결할 모듈 매핑 (각 모듈은 app() 함수와 INPUTS 목록을 가진다)
+app_list = {
+    "🔍 AS상태 업데이트 대상 및 결산마감 대상 선정 시스템": as_analysis_test,
+    "💰 유상 AS 매출 집계 시스템": AS_SALES,
+    "📂 미수채권(미입금) 집계 시스템": Accounts,
+    "📈 AS 처리율 계산 시스템": AS_PROCESS,
+    "🗂️ AS프로젝트 대상 선정 시스템": project,
+    "📝 발주 및 입고지연 집계 시스템": PRPO,
+    "📊 AS 접수/조치/조치일 집계 시스템": AS_summary,
+    "📋 AS채권현황 분석 및 점검 시스템": accounts_summary
+}
+
+# ✅ 어떤 ERP 파일이든 올리면 헤더만 보고 종류를 판별해 해당 파일을 쓰는 기능으로 연결
+with st.sidebar:
+    routed_file = st.file_uploader("📥 ERP 파일 자동 분류 업로드", type=["xlsx"], key="upload_auto")
+    if routed_file is not None:
+        sniffed = datasets.route(routed_file)
+        if sniffed["error"] is not None:
+            st.error(f"❌ 엑셀 파일을 열 수 없습니다. DRM으로 보호된 파일일 수 있습니다.\n\n{sniffed['error']}")
+        elif sniffed["key"] is None:
+            st.error("❗ 어떤 ERP 파일인지 알 수 없습니다. 헤더에서 필요한 컬럼을 찾지 못했습니다.")
+        else:
+            rows = f"{sniffed['rows']:,}건" if sniffed["rows"] is not None else "행 수 미확인"
+            st.success(f"✅ ERP '{datasets.EXPORTS[sniffed['key']]['menu']}' 파일 ({rows})")
+            targets = [name for name, module in app_list.items() if sniffed["key"] in module.INPUTS]
+            if st.session_state.get("routed_file_id") != routed_file.file_id:
+                st.session_state["routed_file_id"] = routed_file.file_id
+                if st.session_state.get("selected_app") not in targets:
+                    st.session_state["selected_app"] = targets[0]
+
+# ✅ 선택 박스 (radio를 사용해 명확한 선택 UI)
+selected_app = st.radio("👇 실행할 기능을 선택하세요:", list(app_list.keys()), key="selected_app")
+selected_module = app_list[selected_app]
+
+# ✅ 세션에 한 번 업로드한 파일은 같은 파일을 쓰는 모든 기능이 재사용
+with st.sidebar:
+    st.header("📦 업로드된 데이터")
+    registry = datasets.registry()
+    for key in selected_module.INPUTS:
+        entry = registry.get(key)
+        if entry and entry["df"] is not None:
+            st.markdown(f"✅ **{key}**: {entry['name']} ({len(entry['df']):,}건)")
+        elif entry and entry["status"] == "parsing":
+            st.markdown(f"⏳ **{key}**: {entry['name']} 읽는 중")
+        else:
+            st.markdown(f"⬜ **{key}**: 업로드 필요 (ERP '{datasets.EXPORTS[key]['menu']}')")
+    st.caption(f"🔗 서버에서 공유 중인 데이터셋 {len(store.stats())}개")
+    queue = jobs.stats()
+    if queue["running"] or queue["queued"]:
+        st.caption(f"⚙️ 작업 대기열: 실행 중 {queue['running']}건 / 대기 {queue['queued']}건")
+    latest = reports.latest()
+    if latest is not None:
+        st.caption(f"🗓️ 예약 집계 결과: {latest['version']} ({', '.join(latest['sources']) or '없음'})")
+        for name, error in latest.get("errors", {}).items():
+            st.caption(f"⚠️ 예약 집계 실패 - {name}: {error}")
+    budget.report()
+    if registry and st.button("🗑️ 업로드 데이터 초기화"):
+        datasets.clear()
+        st.rerun()
+
+# ✅ 선택된 기능 실행
+try:
+    selected_module.app()  # 선택된 기능 함수 실행
+except Exception as e:
+    st.error(f"🚨 앱 실행 중 오류가 발생했습니다:\n\n{e}")
@@ -0,0 +1,47 @@
+import math
+
+import streamlit as st
+
+# ✅ 표 한 페이지에 보여줄 행 수
+PAGE_SIZE = 100
+
+
+def _sort(df, position, descending):
+    # position 번째 컬럼 기준 정렬 (컬럼명이 숫자/튜플이거나 중복돼도 위치로 찾는다)
+    column = df.iloc[:, position].reset_index(drop=True)
+    try:
+        order = column.sort_values(ascending=not descending, kind="stable", na_position="last").index
+    except TypeError:
+        # 숫자/문자가 섞인 컬럼은 문자열 기준으로 정렬
+        order = column.sort_values(ascending=not descending, kind="stable", na_position="last", key=lambda s: s.astype(str)).index
+    return df.iloc[order]
+
+
+@st.fragment
+def paged_dataframe(df, key, page_size=PAGE_SIZE):
+    # 전체 행을 브라우저로 보내지 않고 현재 페이지만 보낸다. 검색과 정렬은 서버에서 처리
+    # 검색/정렬/페이지를 바꾸면 이 표만 다시 실행한다
+    # 선택 값은 컬럼 위치로 두고 이름은 화면에만 문자열로 보여준다 (숫자/튜플 컬럼명도 그대로 찾을 수 있게)
+    positions = list(range(len(df.columns)))
+    label = lambda i: str(df.columns[i])
+    col1, col2, col3, col4 = st.columns([2, 3, 2, 1])
+    with col1:
+        search_col = st.selectbox("🔎 검색 컬럼", positions, format_func=label, key=f"{key}_search_col")
+    with col2:
+        search = st.text_input("검색어", key=f"{key}_search")
+    with col3:
+        sort_col = st.selectbox("↕️ 정렬 기준", [None] + positions, format_func=lambda i: "(원본 순서)" if i is None else label(i), key=f"{key}_sort_col")
+    with col4:
+        descending = st.toggle("내림차순", key=f"{key}_descending")
+
+    view = df
+    if search and search_col is not None:
+        view = view[view.iloc[:, search_col].astype(str).str.contains(search, case=False, regex=False, na=False).to_numpy()]
+    if sort_col is not None:
+        view = _sort(view, sort_col, descending)
+
+    pages = max(math.ceil(len(view) / page_size), 1)
+    page = st.number_input("페이지", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page_{pages}")
+    start = (page - 1) * page_size
+    st.dataframe(view.iloc[start:start + page_size], use_container_width=True)
+    st.caption(f"총 {len(view):,}건 중 {min(start + 1, len(view)):,}–{min(start + page_size, len(view)):,}건 ({page}/{pages} 페이지)")